@@ -1,4 +1,5 @@
 import os
+import sys
 import logging
 from logging.handlers import RotatingFileHandler
 from scripts.generate_model import ModelGenerator
@@ -37,7 +38,10 @@ if __name__ == "__main__":
         config_file = CONFIG_FILE
         label_path = LABEL_WORDS_PATH
         generator = ModelGenerator(config_file, PROJECT_ROOT, label_path)
-        generator.generate_model(config_file, label_path)
+        if "--update" in sys.argv[1:]:
+            generator.update_model(config_file, label_path, force="--force" in sys.argv[1:])
+        else:
+            generator.generate_model(config_file, label_path)
         cleanup_project_cache(PROJECT_ROOT)
         logger.info("Proceso terminado correctamente.")
     except Exception as e:
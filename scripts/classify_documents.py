@@ -0,0 +1,144 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Any, Dict, Optional, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.semantic_classifier import SemanticClassifier
+from src.corpus_io import DOCUMENT_COLUMN, ID_COLUMN, TEXT_COLUMN, LABEL_COLUMN, CorpusWriter, corpus_format, iter_document_batches, list_corpus_files
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "sc_model.pkl")
+# Con el bundle (árboles compilados en memoria mapeada) los workers no importan lightgbm
+BUNDLE_PATH = os.path.join(PROJECT_ROOT, "models", "sc_model")
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "data", "config.yaml")
+INPUT_FOLDER = os.path.join(PROJECT_ROOT, "input")
+OUTPUT_FOLDER = os.path.join(PROJECT_ROOT, "output")
+
+# Un clasificador por proceso worker, creado en el initializer del pool
+_classifier: Optional[SemanticClassifier] = None
+
+def _init_worker(model_path: str, config_file: str) -> None:
+    global _classifier
+    _classifier = SemanticClassifier(model_path, config_file, num_threads=1)
+
+def _classify_file(file_path: str, output_dir: str) -> Tuple[str, int, float]:
+    """Clasifica un documento y escribe su versión anotada. Devuelve (archivo, polígonos, segundos)."""
+    time0 = time.perf_counter()
+    if _classifier is None:
+        raise RuntimeError("Worker sin clasificador inicializado")
+    if corpus_format(file_path) != "json":
+        n = _classify_table(file_path, os.path.join(output_dir, os.path.basename(file_path)))
+        return file_path, n, time.perf_counter() - time0
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        polygons: Dict[str, Dict[str, Any]] = json.load(f)
+
+    poly_ids: List[str] = []
+    texts: List[str] = []
+    for poly_id, poly_data in polygons.items():
+        text = poly_data.get("text", "") if poly_data else ""
+        if isinstance(text, str) and text.strip():
+            poly_ids.append(poly_id)
+            texts.append(text)
+
+    labels, probabilities = _classifier.classify(texts)
+    names = _classifier.label_names(labels)
+    for poly_id, label, name, probs in zip(poly_ids, labels, names, probabilities):
+        polygons[poly_id] = {
+            **polygons[poly_id],
+            "semantic_clasification": int(label),
+            "semantic_name": name,
+            "probability": float(probs.max()),
+        }
+
+    output_path = os.path.join(output_dir, os.path.basename(file_path))
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(polygons, f, ensure_ascii=False, indent=4)
+
+    return file_path, len(texts), time.perf_counter() - time0
+
+def _classify_table(file_path: str, output_path: str) -> int:
+    """NDJSON, Parquet o Arrow: se clasifica y escribe por lotes, en el mismo formato de entrada (con su columna document si la tiene)."""
+    if _classifier is None:
+        raise RuntimeError("Worker sin clasificador inicializado")
+    n_classified = 0
+    with CorpusWriter(output_path, types={"semantic_name": "string", "probability": "float64"}) as writer:
+        for docs, ids, texts, _ in iter_document_batches(file_path):
+            valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+            labels, probabilities = _classifier.classify([texts[i] for i in valid])
+            names = _classifier.label_names(labels)
+            out_labels: List[Optional[int]] = [None] * len(ids)
+            out_names: List[Optional[str]] = [None] * len(ids)
+            out_probs: List[Optional[float]] = [None] * len(ids)
+            for i, label, name, probs in zip(valid, labels, names, probabilities):
+                out_labels[i] = int(label)
+                out_names[i] = name
+                out_probs[i] = float(probs.max())
+            columns: Dict[str, List[Any]] = {
+                ID_COLUMN: ids,
+                TEXT_COLUMN: texts,
+                LABEL_COLUMN: out_labels,
+                "semantic_name": out_names,
+                "probability": out_probs,
+            }
+            if docs is not None:
+                columns = {DOCUMENT_COLUMN: docs, **columns}
+            writer.write_batch(columns)
+            n_classified += len(valid)
+    return n_classified
+
+def classify_directory(input_dir: str, output_dir: str, model_path: str = MODEL_PATH, config_file: str = CONFIG_FILE,
+                       workers: Optional[int] = None, chunksize: int = 1) -> Dict[str, Any]:
+    """
+    Clasifica todos los documentos de input_dir (JSON, NDJSON, Parquet o Arrow) repartiéndolos en un ProcessPoolExecutor.
+    Los resultados se devuelven en el orden (ordenado) de los archivos de entrada.
+    """
+    time0 = time.perf_counter()
+    corpus_files = sorted(list_corpus_files(input_dir))
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"'{len(corpus_files)}' documentos para clasificar con {workers} workers")
+
+    results: List[Tuple[str, int, float]] = []
+    if workers == 1 or len(corpus_files) <= 1:
+        _init_worker(model_path, config_file)
+        results = [_classify_file(path, output_dir) for path in corpus_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, config_file)) as pool:
+            results = list(pool.map(_classify_file, corpus_files, [output_dir] * len(corpus_files), chunksize=chunksize))
+
+    elapsed = time.perf_counter() - time0
+    total_polygons = sum(n for _, n, _ in results)
+    stats = {
+        "files": len(results),
+        "polygons": total_polygons,
+        "seconds": elapsed,
+        "files_per_s": len(results) / elapsed if elapsed else 0.0,
+        "polygons_per_s": total_polygons / elapsed if elapsed else 0.0,
+        "workers": workers,
+    }
+    logger.info(
+        f"Clasificados {stats['files']} documentos ({total_polygons} polígonos) en {elapsed:.4f}s: "
+        f"{stats['files_per_s']:.2f} archivos/s, {stats['polygons_per_s']:.2f} polígonos/s"
+    )
+    return stats
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(filename)s:%(lineno)d %(message)s")
+    parser = argparse.ArgumentParser(description="Clasificación semántica de documentos de polígonos OCR")
+    parser.add_argument("input_dir", nargs="?", default=INPUT_FOLDER)
+    parser.add_argument("output_dir", nargs="?", default=OUTPUT_FOLDER)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--model", default=BUNDLE_PATH if os.path.exists(BUNDLE_PATH) else MODEL_PATH)
+    args = parser.parse_args()
+    classify_directory(args.input_dir, args.output_dir, model_path=args.model, workers=args.workers, chunksize=args.chunksize)
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.corpus_io import FORMATS, CorpusWriter, convert_corpus, list_corpus_files
+
+logger = logging.getLogger(__name__)
+
+INPUT_FOLDER = os.path.join(PROJECT_ROOT, "input")
+
+def convert_folder(input_dir: str, output: str, fmt: str, merge: bool = False) -> int:
+    """
+    Convierte los documentos de input_dir (p. ej. el JSON anidado de input/) a ndjson, parquet o arrow.
+    Con merge todo el corpus va a un único archivo `output`, con la columna document (nombre del archivo de
+    origen) porque los poly_id se repiten entre documentos; si no, un archivo por documento en la carpeta `output`.
+    """
+    time0 = time.perf_counter()
+    ext = f".{fmt}"
+    if ext not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    if merge and FORMATS[ext] == "json":
+        raise ValueError("--merge no admite JSON anidado: los poly_id se repiten entre documentos; usa ndjson, parquet o arrow")
+    files: List[str] = sorted(list_corpus_files(input_dir))
+    total = 0
+    if merge:
+        with CorpusWriter(output) as writer:
+            for file_path in files:
+                document = os.path.splitext(os.path.basename(file_path))[0]
+                total += convert_corpus(file_path, output, writer=writer, document=document)
+    else:
+        for file_path in files:
+            name = os.path.splitext(os.path.basename(file_path))[0] + ext
+            total += convert_corpus(file_path, os.path.join(output, name))
+    logger.info(f"{len(files)} documentos ({total} polígonos) convertidos a {fmt} en {time.perf_counter()-time0:.4f}s")
+    return total
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(filename)s:%(lineno)d %(message)s")
+    parser = argparse.ArgumentParser(description="Conversión del corpus JSON a NDJSON, Parquet o Arrow")
+    parser.add_argument("output", help="Carpeta de salida, o archivo de salida con --merge")
+    parser.add_argument("--input-dir", default=INPUT_FOLDER)
+    parser.add_argument("--format", choices=["ndjson", "jsonl", "parquet", "arrow", "feather", "json"], default="parquet")
+    parser.add_argument("--merge", action="store_true", help="Un solo archivo con todos los documentos")
+    args = parser.parse_args()
+    convert_folder(args.input_dir, args.output, args.format, merge=args.merge)
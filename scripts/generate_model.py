@@ -1,15 +1,19 @@
 import os
+import math
 import logging
 import pickle
 import yaml
 import time
 import numpy as np
-import pandas as pd
 import lightgbm as lgb
 from datetime import datetime
+from sklearn.metrics import log_loss
 from sklearn.model_selection import train_test_split
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from src.train_model import TrainModel
+from src.model_bundle import load_model_bundle, save_model_bundle
+from src.dataset_cache import DatasetCache
+from src.run_report import RunReport
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +25,7 @@ class ModelGenerator:
         self.label_path = label_path
         logger.info(f"Modelos iniciado en: '{time.perf_counter()-time0:.6f}s'")
             
-    def generate_model(self, config_file: str, label_path: str) -> Optional[Dict[str, Any]]:
-        """Lee YAML, normaliza variantes, precomputa n-gramas 2-5y guarda un pickle con toda la info necesaria para WordFinder."""
-        time1 = time.perf_counter()
+    def _load_config(self, config_file: str, label_path: str) -> bool:
         self.label_path = label_path
         self.config_file = config_file
         self.config_dict: Dict[str, Dict[str, Any]] = {}
@@ -35,65 +37,221 @@ class ModelGenerator:
                     self.config_dict = yaml.safe_load(f)
         except Exception as e:
             logger.error(f"Error cargando el modelo: {e}", exc_info=True)
-            return None
+            return False
         self.params = self.config_dict.get("params", {})
         self.encoders = self.params.get("encoders", {})
+        self.training = self.params.get("training", {}) or {}
+        return True
+
+    def generate_model(self, config_file: str, label_path: str) -> Optional[Dict[str, Any]]:
+        """Lee YAML, normaliza variantes, precomputa n-gramas 2-5y guarda un pickle con toda la info necesaria para WordFinder."""
+        time1 = time.perf_counter()
+        report = RunReport("generate_model", self.project_root)
+        with report.stage("config_load"):
+            if not self._load_config(config_file, label_path):
+                return None
 
         try:
             self._train = TrainModel(config=self.config_dict, project_root=self.project_root, label_path=self.label_path)
-            rows = self._train.generate_features()
-            df = pd.DataFrame(rows)
-            df.reset_index(drop=True, inplace=True)  # RangeIndex 0..N-1
-
-            # Construir X,y
-            feature_cols = [c for c in df.columns if c.startswith("f")]
-            X = df[feature_cols].to_numpy(dtype=np.float32)
-            y = df["label_mapped"].to_numpy(dtype=np.int32)
+            self._train.report = report
+            corpus_files = self._train.corpus_files()
+            # X (N, 14) float32 e y en columnas numpy, sin pasar por pandas
+            feature_set = self._train.generate_features(corpus_files)
+            X = feature_set.X
+            y = feature_set.y_mapped
 
             # Split y entrenamiento con params['model_config']
             mc = self.params.get("model_config", {})
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
+            split = {"test_size": 0.2, "random_state": 42, "stratify": True}
+            with report.stage("split", rows=X.shape[0]):
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=split["test_size"], random_state=split["random_state"], stratify=y
+                )
 
-            train_data = lgb.Dataset(X_train, label=y_train)
-            valid_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+            with report.stage("dataset_construction", rows=X.shape[0]):
+                if self._train.feature_cache is not None:
+                    # Junto a la caché de features: reutiliza el binning si X, y y el split no cambiaron
+                    dataset_cache = DatasetCache(os.path.join(self._train.feature_cache.cache_dir, "datasets"))
+                    train_data, valid_data = dataset_cache.load_or_build(X_train, y_train, X_test, y_test, split, mc)
+                else:
+                    # Sin caché el binning es perezoso y queda dentro de boosting
+                    train_data = lgb.Dataset(X_train, label=y_train)
+                    valid_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
 
             now = datetime.now()
             model_gen = now.isoformat()
             
-            model = lgb.train(
-                mc,
-                train_data,
-                valid_sets=[valid_data],
-                num_boost_round=100,
-                callbacks=[lgb.early_stopping(stopping_rounds=10)],
-            )
+            with report.stage("boosting", rows=X_train.shape[0]):
+                model = lgb.train(
+                    mc,
+                    train_data,
+                    valid_sets=[valid_data],
+                    num_boost_round=100,
+                    callbacks=[lgb.early_stopping(stopping_rounds=10)],
+                )
 
         except Exception as e:
             logger.error(f"Error generadndo modelo: {e}", exc_info=True)
 
         try:
         # Evaluación en etiquetas originales (opcional)
-            inv_map: List[Dict[str, int]] = self.encoders.get("conversion_map", [])
-            y_pred = model.predict(X_test)
-            y_pred_conv = np.argmax(y_pred, axis=1)
-            y_pred_orig = np.array([inv_map[int(v)] for v in y_pred_conv])
+            with report.stage("evaluation", rows=X_test.shape[0]):
+                inv_map: List[Dict[str, int]] = self.encoders.get("conversion_map", [])
+                y_pred = model.predict(X_test)
+                y_pred_conv = np.argmax(y_pred, axis=1)
+                y_pred_orig = np.array([inv_map[int(v)] for v in y_pred_conv])
 
         except Exception as e:
             logger.error(f"Error evaluando modelo: {e}", exc_info=True)
 
         logger.info(f"Modelo generado en: {time.perf_counter()-time1}s")
 
-        output_path = os.path.join(self.project_root, "models", "sc_model.pkl")
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
         try:
-            with open(output_path, "wb") as f:
-                pickle.dump(model, f)
-                
+            # Los hashes de los archivos usados permiten a update_model entrenar sólo sobre lo nuevo
+            with report.stage("save"):
+                output_path = self._save_model(model, model_gen, {"training_files": self._train.file_hashes(corpus_files)})
             logger.critical(f"Modelo 'CLASSIFICADOR' generado el {model_gen} guardado en: %s", output_path)
+            log_dir = os.path.join(self.project_root, "data", "logs")
+            report.save(os.path.join(log_dir, "run_report.json"), os.path.join(log_dir, "run_history.jsonl"),
+                        extra={"rows": int(X.shape[0]), "files": len(corpus_files), "best_iteration": model.best_iteration})
             return model
             
         except AttributeError as e:
             logger.info(f"Error costruyendo Modelo: {e}", exc_info=True)
+
+    def update_model(self, config_file: str, label_path: str, force: bool = False) -> Optional[Any]:
+        """
+        Actualiza el modelo actual (init_model) con rondas extra entrenadas sólo con los archivos nuevos
+        o modificados desde el último entrenamiento, más una muestra de repaso de los anteriores.
+        Registra la comparación de validación contra el modelo previo; si el logloss empeora en todas
+        las validaciones no se guarda (devuelve el modelo previo) salvo con force.
+        """
+        time1 = time.perf_counter()
+        if not self._load_config(config_file, label_path):
+            return None
+
+        model_path = os.path.join(self.project_root, "models", "sc_model.pkl")
+        bundle_path = os.path.join(self.project_root, "models", "sc_model")
+        try:
+            with open(model_path, "rb") as f:
+                previous = pickle.load(f)
+            manifest = load_model_bundle(bundle_path, self.encoders).manifest
+        except Exception as e:
+            logger.error(f"No hay modelo previo válido para actualizar, entrena con generate_model: {e}", exc_info=True)
+            return None
+
+        self._train = TrainModel(config=self.config_dict, project_root=self.project_root, label_path=self.label_path)
+        corpus_files = self._train.corpus_files()
+        hashes = self._train.file_hashes(corpus_files)
+        known: Dict[str, str] = manifest.get("training_files", {})
+        if not known:
+            logger.warning("El modelo previo no registra sus archivos de entrenamiento: todos se tratan como nuevos")
+        changed = [p for p in corpus_files if known.get(os.path.basename(p)) != hashes[os.path.basename(p)]]
+        unchanged = [p for p in corpus_files if p not in changed]
+        if not changed:
+            logger.info("Sin archivos nuevos o modificados: el modelo no cambia")
+            return previous
+        logger.info(f"Actualización con {len(changed)} archivos nuevos o modificados y {len(unchanged)} sin cambios")
+
+        new_set = self._train.generate_features(changed)
+        old_set = self._train.generate_features(unchanged)
+
+        # Repaso: fracción aleatoria (semilla fija) de los datos anteriores; el resto valida el olvido
+        rng = np.random.default_rng(42)
+        order = rng.permutation(old_set.X.shape[0])
+        n_replay = int(round(float(self.training.get("replay_fraction", 0.2)) * order.shape[0]))
+        replay, old_holdout = order[:n_replay], order[n_replay:]
+
+        X_new, y_new = new_set.X, new_set.y_mapped
+        if X_new.shape[0] >= 5:
+            # Estratificar exige al menos 2 filas por clase y una fila por clase en cada lado del split
+            counts = np.bincount(y_new)
+            n_classes = int((counts > 0).sum())
+            n_test = int(math.ceil(0.2 * X_new.shape[0]))
+            stratifiable = counts[counts > 0].min() >= 2 and n_test >= n_classes and X_new.shape[0] - n_test >= n_classes
+            stratify = y_new if stratifiable else None
+            X_train, X_valid, y_train, y_valid = train_test_split(X_new, y_new, test_size=0.2, random_state=42, stratify=stratify)
+        else:
+            # Muy pocas filas nuevas para separar validación: se entrena con todas y sólo valida el repaso
+            X_train, y_train = X_new, y_new
+            X_valid, y_valid = X_new[:0], y_new[:0]
+        X_old_valid, y_old_valid = old_set.X[old_holdout], old_set.y_mapped[old_holdout]
+        X_train = np.concatenate([X_train, old_set.X[replay]])
+        y_train = np.concatenate([y_train, old_set.y_mapped[replay]])
+
+        mc = self.params.get("model_config", {})
+        train_data = lgb.Dataset(X_train, label=y_train)
+        # Early stopping sobre los nuevos fuera del entrenamiento y sobre los anteriores fuera del repaso (olvido)
+        valid_sets: List[Any] = []
+        valid_names: List[str] = []
+        for name, X_eval, y_eval in (("new", X_valid, y_valid), ("old_holdout", X_old_valid, y_old_valid)):
+            if X_eval.shape[0]:
+                valid_sets.append(lgb.Dataset(X_eval, label=y_eval, reference=train_data))
+                valid_names.append(name)
+        if not valid_sets:
+            logger.warning("Sin filas de validación: la actualización entrena todas las rondas sin early stopping")
+        model_gen = datetime.now().isoformat()
+        model = lgb.train(
+            mc,
+            train_data,
+            valid_sets=valid_sets,
+            valid_names=valid_names,
+            num_boost_round=int(self.training.get("update_rounds", 30)),
+            init_model=previous,
+            callbacks=[lgb.early_stopping(stopping_rounds=10)] if valid_sets else [],
+        )
+        logger.info(
+            f"Modelo actualizado en: {time.perf_counter()-time1}s "
+            f"({X_new.shape[0]} filas nuevas, {n_replay} de repaso, {model.current_iteration() - previous.current_iteration()} rondas)"
+        )
+
+        num_class = int(mc.get("num_class", 1))
+        compared = 0
+        worse = 0
+        for name, X_eval, y_eval in (("nuevos (validación)", X_valid, y_valid),
+                                     ("anteriores (fuera del repaso)", X_old_valid, y_old_valid)):
+            if not X_eval.shape[0]:
+                continue
+            before = _evaluate(previous, X_eval, y_eval, num_class)
+            after = _evaluate(model, X_eval, y_eval, num_class)
+            compared += 1
+            worse += int(after[0] > before[0])
+            logger.info(
+                f"Validación {name}, {X_eval.shape[0]} filas: logloss {before[0]:.5f} -> {after[0]:.5f}, "
+                f"accuracy {before[1]:.4f} -> {after[1]:.4f}"
+            )
+
+        if compared and worse == compared:
+            if not force:
+                logger.warning("El logloss empeora en todas las validaciones: el modelo actualizado NO se guarda (usa --force para guardarlo)")
+                return previous
+            logger.warning("El logloss empeora en todas las validaciones: se guarda igualmente por --force")
+        elif not compared:
+            logger.warning("Sin filas de validación para comparar con el modelo previo: se guarda sin comprobar")
+
+        extra = {
+            "training_files": hashes,
+            "updated_from": manifest.get("trained_at"),
+            "update": {"files": [os.path.basename(p) for p in changed], "rows": int(X_new.shape[0]), "replay_rows": int(n_replay)},
+        }
+        output_path = self._save_model(model, model_gen, extra)
+        logger.critical(f"Modelo 'CLASSIFICADOR' actualizado el {model_gen} guardado en: %s", output_path)
+        return model
+
+    def _save_model(self, model: Any, model_gen: str, extra: Dict[str, Any]) -> str:
+        output_path = os.path.join(self.project_root, "models", "sc_model.pkl")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "wb") as f:
+            pickle.dump(model, f)
+
+        # Bundle versionado (manifiesto + modelo nativo + árboles compilados) para inferencia sin lightgbm
+        bundle_path = os.path.join(self.project_root, "models", "sc_model")
+        save_model_bundle(bundle_path, model, self.encoders, trained_at=model_gen, extra=extra)
+        return output_path
+
+def _evaluate(model: Any, X: np.ndarray, y: np.ndarray, num_class: int) -> Tuple[float, float]:
+    """(multi_logloss, accuracy) de un Booster sobre las clases del modelo."""
+    probabilities = np.asarray(model.predict(X)).reshape(X.shape[0], -1)
+    loss = log_loss(y, probabilities, labels=list(range(num_class)))
+    accuracy = float(np.mean(np.argmax(probabilities, axis=1) == y))
+    return float(loss), accuracy
@@ -0,0 +1,38 @@
+import os
+import sys
+import logging
+import argparse
+import yaml
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.hyperparam_search import HyperparamSearch
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "data", "config.yaml")
+LABEL_WORDS_PATH = os.path.join(PROJECT_ROOT, "input")
+OUTPUT_FOLDER = os.path.join(PROJECT_ROOT, "models", "search")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(filename)s:%(lineno)d %(message)s")
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros con validación cruzada estratificada")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--input-dir", default=LABEL_WORDS_PATH)
+    parser.add_argument("--output-dir", default=OUTPUT_FOLDER)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--random-samples", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    search = config.setdefault("params", {}).setdefault("search", {}) or {}
+    config["params"]["search"] = search
+    if args.workers is not None:
+        search["workers"] = args.workers
+    if args.random_samples is not None:
+        search["random_samples"] = args.random_samples
+
+    HyperparamSearch(config, PROJECT_ROOT, args.input_dir, args.output_dir).run()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+POLICIES = ("lru", "fifo")
+
+class BoundedCache:
+    """
+    Diccionario acotado con contadores de aciertos/fallos. Con maxsize 0 no guarda nada.
+    Al llenarse desaloja la entrada usada hace más tiempo ("lru") o la insertada primero ("fifo").
+    """
+    def __init__(self, maxsize: int, policy: str = "lru"):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de caché no soportada: {policy} (opciones: {', '.join(POLICIES)})")
+        self.maxsize = max(0, int(maxsize))
+        self.policy = policy
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        if self.policy == "lru":
+            self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.maxsize:
+            return
+        if key in self._data and self.policy == "fifo":
+            self._data[key] = value
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
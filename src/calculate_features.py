@@ -1,26 +1,51 @@
 
 import logging
 import numpy as np
+from array import array
 from fuzzywuzzy import utils #type: ignore
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple, Union
+from src.encoder_tables import EncoderTables, FALLBACK_CODE, get_encoder_tables
 
 logger = logging.getLogger(__name__)
 
-def calculate_features(s: str, encoders: Dict[str, Any]):
-    char_num: List[str] = encoders["char_num"]
-    density_encoder: Dict[str, float] = encoders.get("density_encoder", {})
-    inv_encoder_density: Dict[str, float] = encoders.get("inv_encoder_density", {})
+FEATURE_NAMES: List[str] = [
+    "mean_encoded",
+    "std_encoded",
+    "var_encoded",
+    "inv_mean_encoded",
+    "inv_std_encoded",
+    "inv_var_encoded",
+    "mean_morph",
+    "std_morph",
+    "var_morph",
+    "num_pct",
+    "alpha_pct",
+    "spc_pct",
+    "word_len",
+    "money"
+]
 
-    encoded_poly = encode_text(s, density_encoder)
+# Tamaño de bloque de la suma por pares de numpy (PW_BLOCKSIZE)
+_PW_BLOCKSIZE = 128
+_MONEY_CHARS = (ord('.'), ord('$'), ord(','))
+_EMPTY = np.zeros(0, dtype=np.float32)
+_UNSEEN = object()
+# Hasta 2**24 las sumas float32 de enteros son exactas
+_EXACT_F32_SUM = float(2 ** 24)
+
+def calculate_features(s: str, encoders: Union[Dict[str, Any], EncoderTables]):
+    tables = get_encoder_tables(encoders)
+
+    encoded_poly = encode_text(s, tables, tables.density)
     mean_encoded, std_encoded, var_encoded = vectorice_values(encoded_poly)
 
-    inv_encoded_poly = encode_text(s, inv_encoder_density)
+    inv_encoded_poly = encode_text(s, tables, tables.inv_density)
     inv_mean_encoded, inv_std_encoded, inv_var_encoded = vectorice_values(inv_encoded_poly)
 
-    morph_poly = get_morphological_encode(s, char_num)
+    morph_poly = get_morphological_encode(s, tables)
     mean_morph, std_morph, var_morph = vectorice_values(morph_poly)
 
-    num_pct, alpha_pct, spc_pct, word_len = calculate_percentages(s, char_num)
+    num_pct, alpha_pct, spc_pct, word_len = calculate_percentages(s, tables)
 
     money = calculate_textual_features(s)
 
@@ -43,40 +68,230 @@ def calculate_features(s: str, encoders: Dict[str, Any]):
         dtype=np.float32
     )
 
-    feature_names = [
-        "mean_encoded",
-        "std_encoded",
-        "var_encoded",
-        "inv_mean_encoded",
-        "inv_std_encoded",
-        "inv_var_encoded",
-        "mean_morph",
-        "std_morph",
-        "var_morph",
-        "num_pct",
-        "alpha_pct",
-        "spc_pct",
-        "word_len",
-        "money"
-    ]
-
-    feature_dict = {name: float(value) for name, value in zip(feature_names, features)}
-    log_message = "Features: " + ", ".join([f"{k}: {v:.4f}" for k, v in feature_dict.items()])
-    logger.debug(log_message)
+    if logger.isEnabledFor(logging.DEBUG):
+        feature_dict = {name: float(value) for name, value in zip(FEATURE_NAMES, features)}
+        log_message = "Features: " + ", ".join([f"{k}: {v:.4f}" for k, v in feature_dict.items()])
+        logger.debug(log_message)
 
     return features
-    
+
+def calculate_features_fused(s: str, encoders: Union[Dict[str, Any], EncoderTables]) -> np.ndarray:
+    """
+    Kernel de baja latencia para un solo polígono: recorre el texto una vez acumulando conteos y sumas,
+    y deja los códigos en buffers float32 para la varianza. Coincide bit a bit con calculate_features.
+    """
+    tables = get_encoder_tables(encoders)
+    if not utils.validate_string(s):  # type: ignore
+        return _empty_features()
+
+    get_code = tables.char_codes.get
+    dens = array("f")
+    inv = array("f")
+    morph = array("f")
+    n = num = alpha = money = 0
+    sum_dens = sum_inv = 0.0
+
+    for ch in s:
+        code = get_code(ch, _UNSEEN)
+        if code is _UNSEEN:
+            code = tables.char_code(ch)
+        if code is None:
+            continue
+        if code is FALLBACK_CODE:
+            return calculate_features(s, tables)
+        d, iv, m, is_num, is_alpha, is_money = code
+        dens.append(d)
+        inv.append(iv)
+        morph.append(m)
+        sum_dens += d
+        sum_inv += iv
+        n += 1
+        num += is_num
+        alpha += is_alpha
+        money += is_money
+
+    if not n:
+        return _empty_features()
+
+    # np.var usa suma por pares en float32: se calcula sobre los buffers para mantener los mismos bits
+    block = np.frombuffer(dens + inv + morph, dtype=np.float32).reshape(3, n)
+    var = block.var(axis=1)
+    std = np.sqrt(var)
+
+    # Con valores enteros la suma float32 es exacta y la media sale de las sumas acumuladas
+    if tables.integral_values and n * tables.max_abs_value < _EXACT_F32_SUM:
+        mean_dens = sum_dens / n
+        mean_inv = sum_inv / n
+    else:
+        mean_dens, mean_inv = block[:2].mean(axis=1)
+
+    num_pct = (num / n) * 100.0
+    alpha_pct = (alpha / n) * 100.0
+    alphanum = num_pct + alpha_pct
+    spc_pct = 0.0 if alphanum == 100.0 else 100.0 - alphanum
+
+    return np.array([
+        mean_dens, std[0], var[0],
+        mean_inv, std[1], var[1],
+        (num - alpha) / n, std[2], var[2],
+        num_pct, alpha_pct, spc_pct,
+        float(n), float(money)
+        ],
+        dtype=np.float32
+    )
+
+def _empty_features() -> np.ndarray:
+    """Features de un texto sin caracteres: calculate_percentages deja spc_pct en 100."""
+    features = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+    features[11] = 100.0
+    return features
+
+def calculate_features_batch(texts: List[str], encoders: Union[Dict[str, Any], EncoderTables]) -> np.ndarray:
+    """
+    Calcula las features de una lista de polígonos en una sola pasada vectorizada.
+    Devuelve una matriz (N, 14) float32 con el mismo orden de columnas que calculate_features.
+    """
+    tables = get_encoder_tables(encoders)
+
+    n_texts = len(texts)
+    features = np.zeros((n_texts, len(FEATURE_NAMES)), dtype=np.float32)
+    if not n_texts:
+        return features
+
+    clean_texts = [t if isinstance(t, str) else "" for t in texts]
+
+    # Buffers planos de codepoints con sus longitudes por polígono
+    compact = [''.join(t.split()) for t in clean_texts]
+    lower_compact = [''.join(t.lower().split()) for t in clean_texts]
+    cps, lengths = _flatten_codepoints(compact)
+    low_cps, low_lengths = _flatten_codepoints(lower_compact)
+
+    density = tables.lookup(tables.density, low_cps)
+    inv_density = tables.lookup(tables.inv_density, low_cps)
+
+    morph = tables.morph_of(cps)
+    num_mask = morph > 0
+    alpha_mask = morph < 0
+
+    features[:, 0], features[:, 1], features[:, 2] = _segment_stats(density, low_lengths)
+    features[:, 3], features[:, 4], features[:, 5] = _segment_stats(inv_density, low_lengths)
+    features[:, 6], features[:, 7], features[:, 8] = _segment_stats(morph, lengths)
+
+    # Porcentajes en float64, mismas operaciones que calculate_percentages
+    word_len = lengths.astype(np.float64)
+    has_chars = lengths > 0
+    safe_len = np.where(has_chars, word_len, 1.0)
+    num_pct = np.where(has_chars, (_segment_count(num_mask, lengths) / safe_len) * 100.0, 0.0)
+    alpha_pct = np.where(has_chars, (_segment_count(alpha_mask, lengths) / safe_len) * 100.0, 0.0)
+    alphanum = num_pct + alpha_pct
+    spc_pct = np.where(alphanum == 100.0, 0.0, 100.0 - alphanum)
+
+    money_mask = np.isin(cps, _MONEY_CHARS)
+
+    features[:, 9] = num_pct
+    features[:, 10] = alpha_pct
+    features[:, 11] = spc_pct
+    features[:, 12] = word_len
+    features[:, 13] = _segment_count(money_mask, lengths)
+
+    logger.debug(f"Features batch: {n_texts} polígonos, {cps.shape[0]} caracteres")
+    return features
+
+def _flatten_codepoints(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatena los textos en un buffer plano de codepoints y devuelve las longitudes de cada segmento."""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    flat = ''.join(texts)
+    cps = np.frombuffer(flat.encode("utf-32-le"), dtype="<u4").astype(np.int64)
+    return cps, lengths
+
+def _segment_count(mask: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Cuenta los True de cada segmento del buffer plano."""
+    csum = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    ends = np.cumsum(lengths)
+    return (csum[ends] - csum[ends - lengths]).astype(np.float64)
+
+def _segment_stats(values: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Media, desviación estándar y varianza float32 por segmento.
+    Reproduce la suma por pares de np.mean/np.var, por lo que coincide bit a bit con vectorice_values.
+    """
+    n_seg = lengths.shape[0]
+    mean = np.zeros(n_seg, dtype=np.float32)
+    var = np.zeros(n_seg, dtype=np.float32)
+    starts = np.cumsum(lengths) - lengths
+
+    # Segmentos largos: numpy divide recursivamente, se delega en np.mean/np.var
+    for i in np.flatnonzero(lengths > _PW_BLOCKSIZE):
+        seg = values[starts[i]:starts[i] + lengths[i]]
+        mean[i] = np.mean(seg)
+        var[i] = np.var(seg)
+
+    short = np.flatnonzero((lengths > 0) & (lengths <= _PW_BLOCKSIZE))
+    if short.size:
+        seg_len = lengths[short]
+        width = int(-(-seg_len.max() // 8) * 8)
+        cols = np.arange(width)
+        valid = cols[None, :] < seg_len[:, None]
+        idx = np.where(valid, starts[short][:, None] + cols[None, :], 0)
+        padded = np.where(valid, values[idx], np.float32(0.0))
+
+        count = seg_len.astype(np.float32)
+        seg_mean = _pairwise_sum_f32(padded, seg_len) / count
+        dev = np.where(valid, padded - seg_mean[:, None], np.float32(0.0))
+        seg_var = _pairwise_sum_f32(dev * dev, seg_len) / count
+        mean[short] = seg_mean
+        var[short] = seg_var
+
+    return mean, np.sqrt(var), var
+
+def _pairwise_sum_f32(padded: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Suma por filas de una matriz float32 rellena con ceros (longitud <= 128), en el mismo orden
+    que la suma por pares de numpy: 8 acumuladores por bloques, árbol final y resto secuencial.
+    """
+    n_rows, width = padded.shape
+    total = np.zeros(n_rows, dtype=np.float32)
+
+    seq = lengths < 8
+    if seq.any():
+        rows = padded[seq]
+        acc = np.zeros(rows.shape[0], dtype=np.float32)
+        for k in range(min(8, width)):
+            acc += rows[:, k]
+        total[seq] = acc
+
+    blocked = ~seq
+    if blocked.any():
+        rows = padded[blocked]
+        seg_len = lengths[blocked]
+        body_end = seg_len - seg_len % 8
+        cols = np.arange(width)
+        body = np.where(cols[None, :] < body_end[:, None], rows, np.float32(0.0)).reshape(rows.shape[0], -1, 8)
+        r = body[:, 0, :].copy()
+        for k in range(1, body.shape[1]):
+            r += body[:, k, :]
+        acc = ((r[:, 0] + r[:, 1]) + (r[:, 2] + r[:, 3])) + ((r[:, 4] + r[:, 5]) + (r[:, 6] + r[:, 7]))
+
+        rest = body_end[:, None] + np.arange(7)[None, :]
+        rest_valid = rest < seg_len[:, None]
+        tail = np.where(rest_valid, np.take_along_axis(rows, np.minimum(rest, width - 1), axis=1), np.float32(0.0))
+        for k in range(7):
+            acc += tail[:, k]
+        total[blocked] = acc
+
+    return total
+
 def calculate_textual_features(s: str) -> float:
     point_c = float(s.count('.'))
     money_c = float(s.count('$'))
     coma_c = float(s.count(','))
     return coma_c + money_c + point_c
 
-def calculate_percentages(s: str, char_num: List[str]):
-    chars = [ch for ch in s if not ch.isspace()]
-    word_len = len(chars)
-    num_pct = (sum(1 for ch in chars if ch in char_num) / word_len) * 100.0 if word_len else 0.0
-    alpha_pct = (sum(1 for ch in chars if ch.isalpha() and ch not in char_num) / word_len) * 100.0 if word_len else 0.0
+def calculate_percentages(s: str, tables: EncoderTables):
+    compact = ''.join(s.split())
+    word_len = len(compact)
+    num_pct = (tables.count_numeric(compact) / word_len) * 100.0 if word_len else 0.0
+    alpha_pct = (tables.count_alpha(compact) / word_len) * 100.0 if word_len else 0.0
 
     alphanum =  num_pct + alpha_pct
     if alphanum == 100.0:
@@ -86,47 +301,39 @@ def calculate_percentages(s: str, char_num: List[str]):
     
     return num_pct, alpha_pct, spc_pct, float(word_len)
 
-def encode_text(text: str, encoder: Dict[str, float]) -> List[float]:
+def encode_text(text: str, tables: EncoderTables, table: np.ndarray) -> np.ndarray:
     try:
         if not utils.validate_string(text):  # type:ignore
-            return []
+            return _EMPTY
 
         if text:
             minus_text = text.lower()
             compact_text = ''.join(minus_text.split())
-            encoded_poly = [encoder.get(char, 0) for char in compact_text]
+            encoded_poly = tables.lookup(table, tables.codepoints(compact_text))
 
             return encoded_poly
 
     except Exception as e:
         logger.warning(f"Error codificando polígonos: {e}", exc_info=True)
-    return []
+    return _EMPTY
 
-def get_morphological_encode(text: str, char_num: List[str]) -> List[float]:
+def get_morphological_encode(text: str, tables: EncoderTables) -> np.ndarray:
     try:
-        result: List[float] = []
         if not utils.validate_string(text):  # type:ignore
-            return []
+            return _EMPTY
 
         compact_text = ''.join(text.split())
-        for ch in compact_text:
-            if ch in char_num:
-                result.append(1.0)
-            elif ch.isalpha():
-                result.append(-1.0)
-            else:
-                result.append(0.0)
-        return result
+        return tables.morph_of(tables.codepoints(compact_text))
 
     except Exception as e:
         logger.warning(f"Error codificando polígonos: {e}", exc_info=True)
-    return []
+    return _EMPTY
 
-def vectorice_values(data_list: List[float]) -> List[float]:
+def vectorice_values(data_list: Union[np.ndarray, List[float]]) -> List[float]:
     """
     Calcula estadísticas vectorizadas (media, desviación estándar, varianza) de una lista de valores.
     """
-    if not data_list:
+    if len(data_list) == 0:
         return [0.0, 0.0, 0.0]
 
     value_array = np.array(data_list, dtype=np.float32)
@@ -2,16 +2,66 @@ import os
 import datetime
 import logging
 import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Any, Dict, Optional, Tuple
+from typing import List, Any, Dict, NamedTuple, Optional, Tuple
 from cleantext import clean  # type: ignore
+import numpy as np
+from src.bounded_cache import BoundedCache
+from src.ngram_index import NgramIndex, QueryGrams
+from src.soft_cosine import PAD_B, binary_cosine_scores, encode_grams, gather_rows, soft_intersections
 
 logger = logging.getLogger(__name__)
 
+# Entradas máximas de la tabla del filtro global (vocabulario + n-gramas de consultas ya vistos)
+_MAX_PREFILTER_TABLE = 1_000_000
+# Por debajo de estos textos find_keywords_batch no abre el pool: cargar el modelo en cada worker cuesta más
+_MIN_PARALLEL_TEXTS = 256
+# Textos por tarea del pool; los documentos más largos se parten en varias tareas
+_PARALLEL_CHUNK = 64
+
+class CompiledWords(NamedTuple):
+    """Palabras (global_words o noise_words) ya en la forma que usa la búsqueda por ventanas."""
+    words: List[str]
+    grams: List[Dict[int, set[str]]]
+    lens: List[int]
+    len_array: np.ndarray
+    min_w: List[int]
+    max_w: List[int]
+    nrange: Tuple[int, int]
+    # Por n: code points de los n-gramas de todas las palabras apilados (los de i en starts[i]:starts[i+1]),
+    # sus longitudes y starts; y el número de n-gramas de cada palabra
+    codes: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    sizes: Dict[int, np.ndarray]
+
+# Un WordFinder por proceso worker, creado en el initializer del pool
+_worker_finder: Optional["WordFinder"] = None
+
+def _init_keywords_worker(model_path: str, result_cache_size: int, forbidden_cache_size: int, cache_policy: str) -> None:
+    global _worker_finder
+    _worker_finder = WordFinder(model_path, result_cache_size, forbidden_cache_size, cache_policy)
+
+def _keywords_worker(job: Tuple[List[str], Optional[float]]) -> Optional[List[Dict[str, Any]]]:
+    if _worker_finder is None:
+        raise RuntimeError("Worker sin WordFinder inicializado")
+    texts, threshold = job
+    return _worker_finder.find_keywords(texts, threshold)
+
 class WordFinder:
-    def __init__(self, model_path: str):
-        self.model: Dict[str, Any] = self._load_model(model_path)
+    def __init__(self, model_path: str, result_cache_size: int = 4096, forbidden_cache_size: int = 4096, cache_policy: str = "lru"):
+        self.model_path = model_path
         self.wf_path: str = "C:/word_finder_model/src/word_finder.py"
+        # Resultado de find_keywords por (texto limpio, umbral) y de _is_forbidden por texto limpio
+        self.result_cache = BoundedCache(result_cache_size, cache_policy)
+        self.forbidden_cache = BoundedCache(forbidden_cache_size, cache_policy)
+        self.reload()
+
+    def reload(self, model_path: Optional[str] = None) -> None:
+        """(Re)carga y compila el modelo. Los cachés se vacían: sus resultados dependen del modelo."""
+        if model_path is not None:
+            self.model_path = model_path
+        self.model: Dict[str, Any] = self._load_model(self.model_path)
         self.params = self.model.get("params", {})
         self.global_words: List[str] = self.model["global_words"]
         self.variant_to_field = self.model.get("variant_to_field", {})
@@ -32,8 +82,13 @@ class WordFinder:
         self.global_counter = self.global_filter.get("global_counter", None)
         self.global_vocab = self.global_filter.get("global_vocab", None)
         self.model_time = self.model.get("model_time")
-        timestamp_model = os.path.getmtime(self.wf_path)
-        fecha_wf = datetime.fromtimestamp(timestamp_model).isoformat()
+        self.result_cache.clear()
+        self.forbidden_cache.clear()
+        self._compile()
+        fecha_wf = "no disponible"
+        if os.path.exists(self.wf_path):
+            timestamp_model = os.path.getmtime(self.wf_path)
+            fecha_wf = datetime.fromtimestamp(timestamp_model).isoformat()
         logger.critical(f"FECHA DE GENERACIÓN DEL MODELO: {self.model_time}, FECHA DEL SCRIPT WORD_FINDER.PY: {fecha_wf}")
 
     def _load_model(self, model_path: str) -> Dict[str, Any]:
@@ -50,7 +105,6 @@ class WordFinder:
             raise
 
     def find_keywords(self, text: List[str] | str, threshold: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
-        global_range: Tuple[int, int] = self.gngr
         try:
             final_threshold = threshold if threshold is not None else self.threshold
 
@@ -59,107 +113,188 @@ class WordFinder:
                 text = [text]
                 single = True
 
-            results: List[Dict[str, Any]] = []
-            for s in text:
-
-                if s is None:
-                    return None
+            if any(s is None for s in text):
+                return None
 
-                q = self._clean_text(s)
-                if not q:
+            cleaned = [self._clean_text(s) for s in text]
+            found: Dict[Tuple[str, float], List[Dict[str, Any]]] = {}
+            pending: List[str] = []
+            for q in cleaned:
+                if not q or (q, final_threshold) in found:
                     continue
+                matches = self.result_cache.get((q, final_threshold))
+                if matches is None:
+                    pending.append(q)
+                    matches = []
+                found[(q, final_threshold)] = matches
+
+            # Filtro global de todos los textos nuevos del lote en una pasada
+            if pending:
+                flags = self._potential_keywords(pending, self.gngr)
+                for q, potential in zip(pending, flags):
+                    matches = self._find_in_text(q, final_threshold, potential)
+                    self.result_cache.put((q, final_threshold), matches)
+                    found[(q, final_threshold)] = matches
 
-                if not self._is_potential_keyword(q, global_range):
-                    continue
+            results: List[Dict[str, Any]] = []
+            for q in cleaned:
+                if q:
+                    # Copias: quien llama puede modificar los dicts sin tocar el caché
+                    results.extend(dict(match) for match in found[(q, final_threshold)])
 
-                if self._is_forbidden(q):
-                    continue
+            if single:
+                return results if results else []
+            return results
 
-                # Lista para guardar todos los matches de este string 's'
-                found_matches_for_s: List[Dict[str, Any]] = []
+        except Exception as e:
+            logger.error(f"Error principal en find_keywords: {e}", exc_info=True)
+            return None
 
-                for i in range(len(self.global_words)):
-                    cand = self.global_words[i]
-                    cand_len = len(cand)
-                    min_w = max(1, cand_len - self.window_flex)
-                    if min_w > len(q):
-                        continue
-                    max_w = min(len(q), cand_len + self.window_flex)
-                    grams_cand = self.global_ngrams[i]
+    def find_keywords_batch(self, documents: List[List[str] | str], threshold: Optional[float] = None,
+                            workers: Optional[int] = None) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        find_keywords de cada documento (lista de textos o un texto) repartido en un ProcessPoolExecutor.
+        Devuelve un resultado por documento, en el orden de entrada e igual al de find_keywords(documento).
+        Cada worker carga el modelo una vez desde model_path; los lotes pequeños se procesan en este proceso.
+        """
+        docs: List[List[str]] = [[d] if isinstance(d, str) else list(d) for d in documents]
+        total = sum(len(d) for d in docs)
+        workers = int(workers) if workers else (os.cpu_count() or 1)
+        # Tareas de hasta _PARALLEL_CHUNK textos: una lista grande también se reparte entre workers
+        jobs: List[Tuple[List[str], Optional[float]]] = []
+        owners: List[int] = []
+        for index, texts in enumerate(docs):
+            for start in range(0, max(1, len(texts)), _PARALLEL_CHUNK):
+                jobs.append((texts[start:start + _PARALLEL_CHUNK], threshold))
+                owners.append(index)
+        workers = max(1, min(workers, len(jobs)))
+
+        if workers == 1 or total < _MIN_PARALLEL_TEXTS:
+            return [self.find_keywords(d, threshold) for d in documents]
+
+        time0 = time.perf_counter()
+        results: List[Optional[List[Dict[str, Any]]]] = [[] for _ in docs]
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_keywords_worker,
+                                     initargs=(self.model_path, self.result_cache.maxsize,
+                                               self.forbidden_cache.maxsize, self.result_cache.policy)) as pool:
+                # pool.map conserva el orden de jobs: las partes de cada documento se concatenan en orden
+                for index, part in zip(owners, pool.map(_keywords_worker, jobs)):
+                    if part is None or results[index] is None:
+                        results[index] = None
+                    else:
+                        results[index].extend(part)
+        except Exception as e:
+            logger.error(f"Error en find_keywords_batch con {workers} workers: {e}", exc_info=True)
+            raise
 
-                    if isinstance(grams_cand, dict):
-                        pass
+        logger.info(f"find_keywords_batch: {len(docs)} documentos, {total} textos, {workers} workers en {time.perf_counter()-time0:.4f}s")
+        return results
 
-                    else:
-                        try:
-                            # list/tuple of ngram strings -> group by length
-                            if isinstance(grams_cand, (list, tuple, set)) and all(
-                                    isinstance(x, str) for x in grams_cand):
-                                normalized: Dict[int, set[str]] = {}
-                                for g in grams_cand:
-                                    normalized.setdefault(len(g), set()).add(g)
-                                grams_cand = normalized
-                            else:
-                                # Unknown format (e.g. (word, freq) or other) -> build on the fly
-                                grams_cand = self._build_query_grams(cand, global_range)
-                        except Exception:
-                            grams_cand = self._build_query_grams(cand, global_range)
-
-                    try:
-                        for w in range(min_w, max_w + 1):
-                            if w > len(q):
-                                break
-                            for j in range(0, len(q) - w + 1):
-                                sub = q[j:j + w]
-                                grams_sub = self._build_query_grams(sub, global_range)
-                                # Solo asignar similitud perfecta si es la misma palabra completa (misma longitud)
-                                if sub == cand and len(sub) == cand_len:
-                                    ngram_score: float = 1.0
-                                else:
-                                    ngram_score: float = self._score_binary_cosine_multi_n(grams_cand, grams_sub, global_range)
-                                    len_ratio = max(len(sub), cand_len) / max(1, min(len(sub), cand_len))
-                                    if len_ratio >= 2.0:
-                                        penalty = min(len(sub), cand_len) / max(len(sub), cand_len)
-                                        ngram_score *= penalty
-                                if ngram_score > final_threshold:
-                                    if self._is_forbidden(cand):
-                                        continue
-
-                                    key_field = self.variant_to_field.get(cand)
-                                    # Añadir el match a la lista temporal en lugar de retornar
-                                    found_matches_for_s.append({
-                                        "key_field": key_field,
-                                        "word_found": cand,
-                                        "similarity": float(ngram_score),
-                                        "text": q
-                                    })
-
-                    except Exception as e:
-                        logger.error(f"Error en el bucle de búsqueda de find_keywords: {e}", exc_info=True)
-                
-                # Después de comprobar todos los candidatos, agrupar y seleccionar el mejor por campo
-                if found_matches_for_s:
-                    best_match_by_field: Dict[str, Dict[str, Any]] = {}
-                    
-                    for match in found_matches_for_s:
-                        field = match["key_field"]
-                        
-                        # Si es el primer match para este campo, o si es mejor que el guardado
-                        if field not in best_match_by_field or match["similarity"] > best_match_by_field[field]["similarity"]:
-                            best_match_by_field[field] = match
-                    
-                    # Desempatar usando la similitud de palabra completa
-                    final_matches = self._resolve_ambiguity_by_full_word(list(best_match_by_field.values()))
-                    results.extend(final_matches)
+    def _find_in_text(self, q: str, final_threshold: float, potential: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Mejor match por campo (ya desempatado) de un texto limpio; `potential` es el filtro global si ya se calculó."""
+        global_range: Tuple[int, int] = self.gngr
+        if potential is None:
+            potential = self._is_potential_keyword(q, global_range)
+        if not potential:
+            return []
 
+        if self._is_forbidden(q):
+            return []
 
-            if single:
-                return results if results else []
-            return results
+        # Lista para guardar todos los matches de este string 's'
+        found_matches_for_s: List[Dict[str, Any]] = []
 
+        # N-gramas de q con su posición, compartidos por el índice y todas las ventanas.
+        # Sólo se evalúan los candidatos que comparten suficientes n-gramas con q para poder pasar el umbral
+        query = QueryGrams(q, global_range)
+        candidates = [i for i in self.index.candidates(query, final_threshold) if self.compiled_global.min_w[i] <= len(q)]
+        hits: List[Tuple[int, int, int, float]] = []
+        try:
+            hits = self._score_windows(query, self.compiled_global, candidates, final_threshold)
         except Exception as e:
-            logger.error(f"Error principal en find_keywords: {e}", exc_info=True)
-            return None
+            logger.error(f"Error en el bucle de búsqueda de find_keywords: {e}", exc_info=True)
+
+        # Mismo orden que el recorrido candidato -> ancho -> posición
+        for i, _, _, ngram_score in sorted(hits):
+            cand = self.global_words[i]
+            if self.forbidden_flags[i]:
+                continue
+
+            key_field = self.variant_to_field.get(cand)
+            # Añadir el match a la lista temporal en lugar de retornar
+            found_matches_for_s.append({
+                "key_field": key_field,
+                "word_found": cand,
+                "similarity": float(ngram_score),
+                "text": q
+            })
+
+        if not found_matches_for_s:
+            return []
+
+        # Después de comprobar todos los candidatos, agrupar y seleccionar el mejor por campo
+        best_match_by_field: Dict[str, Dict[str, Any]] = {}
+        for match in found_matches_for_s:
+            field = match["key_field"]
+
+            # Si es el primer match para este campo, o si es mejor que el guardado
+            if field not in best_match_by_field or match["similarity"] > best_match_by_field[field]["similarity"]:
+                best_match_by_field[field] = match
+
+        # Desempatar usando la similitud de palabra completa
+        return self._resolve_ambiguity_by_full_word(list(best_match_by_field.values()))
+
+    def _score_windows(self, query: QueryGrams, compiled: CompiledWords, ids: List[int], threshold: float) -> List[Tuple[int, int, int, float]]:
+        """
+        Evalúa todas las ventanas q[j:j+w] contra las palabras `ids` cuyo rango de ventana incluye w.
+        Para cada ancho, todas las ventanas se comparan con todas esas palabras en una sola operación
+        vectorizada; sus n-gramas salen de los de la consulta, calculados una vez.
+        Devuelve (palabra, w, j, score) de las ventanas que superan el umbral.
+        """
+        q = query.q
+        ns = range(compiled.nrange[0], compiled.nrange[1] + 1)
+        weights = [self.n_weights[n] for n in ns]
+        by_width: Dict[int, List[int]] = {}
+        for i in ids:
+            for w in range(compiled.min_w[i], min(len(q), compiled.max_w[i]) + 1):
+                by_width.setdefault(w, []).append(i)
+
+        hits: List[Tuple[int, int, int, float]] = []
+        for w, width_ids in by_width.items():
+            windows = len(q) - w + 1
+            soft: List[np.ndarray] = []
+            sizes_a: List[np.ndarray] = []
+            sizes_b: List[np.ndarray] = []
+            for n in ns:
+                if w >= n:
+                    codes, lens, starts = compiled.codes[n]
+                    rows, owners = gather_rows(starts, width_ids)
+                    b_codes = query.window_codes(n, w)
+                    soft.append(soft_intersections(codes[rows], lens[rows], owners, len(width_ids), b_codes, np.full(b_codes.shape[:2], n)))
+                else:
+                    soft.append(np.zeros((windows, len(width_ids)), dtype=np.float64))
+                sizes_a.append(compiled.sizes[n][width_ids])
+                sizes_b.append(query.window_sizes(n, w))
+            scores = binary_cosine_scores(soft, sizes_a, sizes_b, weights)
+
+            word_lens = compiled.len_array[width_ids]
+            len_ratio = np.maximum(w, word_lens) / np.maximum(1, np.minimum(w, word_lens))
+            penalized = len_ratio >= 2.0
+            scores[:, penalized] *= (np.minimum(w, word_lens) / np.maximum(w, word_lens))[penalized]
+            # Similitud perfecta sólo para la palabra completa (misma longitud que la ventana)
+            exact: Dict[str, List[int]] = {}
+            for k, i in enumerate(width_ids):
+                if compiled.lens[i] == w:
+                    exact.setdefault(compiled.words[i], []).append(k)
+            if exact:
+                for j in range(windows):
+                    for k in exact.get(q[j:j + w], ()):
+                        scores[j, k] = 1.0
+
+            for j, k in zip(*np.nonzero(scores > threshold)):
+                hits.append((width_ids[k], w, int(j), float(scores[j, k])))
+        return hits
 
     def _resolve_ambiguity_by_full_word(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -207,6 +342,63 @@ class WordFinder:
         )
         return [matches[0]]
 
+    def _compile(self) -> None:
+        """
+        Deja el modelo en la forma que usa la búsqueda: n-gramas por palabra agrupados por n,
+        longitudes y límites de ventana por palabra y los pesos de weights_by_n resueltos por n.
+        """
+        # Peso por n (índice = n) para los rangos global y de ruido
+        top = max(self.gngr[1], self.ngr[1])
+        self.n_weights: List[float] = [self._get_weight_by_n(n) for n in range(top + 1)]
+        self._compile_prefilter()
+        self.compiled_global = self._compile_words(self.global_words, self.global_ngrams, self.gngr)
+        self.compiled_noise = self._compile_words(self.noise_words, self.noise_grams, self.ngr)
+        self.index = NgramIndex(self.global_words, self.compiled_global.grams, self.gngr,
+                                [self.n_weights[n] for n in range(self.gngr[0], self.gngr[1] + 1)], self.window_flex)
+        # global_words es fijo: su chequeo de ruido se hace una vez aquí y no en cada match
+        flags: Dict[str, bool] = {}
+        self.forbidden_flags: List[bool] = [
+            flags[w] if w in flags else flags.setdefault(w, self._check_forbidden(w, logging.DEBUG)) for w in self.global_words]
+        logger.info(f"{sum(self.forbidden_flags)} de {len(self.global_words)} palabras de global_words coinciden con ruido")
+
+    def _compile_words(self, words: List[str], raw_grams: List[Any], nrange: Tuple[int, int]) -> CompiledWords:
+        flex = self.window_flex
+        grams = [self._compile_grams(g, w, nrange) for w, g in zip(words, raw_grams)]
+        lens = [len(w) if w else 0 for w in words]
+        codes: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        sizes: Dict[int, np.ndarray] = {}
+        for n in range(nrange[0], nrange[1] + 1):
+            sets = [g.get(n, set()) for g in grams]
+            n_codes, n_lens = encode_grams(gram for A in sets for gram in A)
+            starts = np.concatenate([[0], np.cumsum([len(A) for A in sets])]).astype(np.int64)
+            codes[n] = (n_codes, n_lens, starts)
+            sizes[n] = np.array([len(A) for A in sets], dtype=np.float64)
+        return CompiledWords(
+            words=list(words),
+            grams=grams,
+            lens=lens,
+            len_array=np.asarray(lens, dtype=np.int64),
+            min_w=[max(1, n - flex) for n in lens],
+            max_w=[n + flex for n in lens],
+            nrange=nrange,
+            codes=codes,
+            sizes=sizes,
+        )
+
+    def _compile_grams(self, grams: Any, word: str, nrange: Tuple[int, int]) -> Dict[int, set[str]]:
+        """N-gramas de una palabra agrupados por n: dict del modelo, lista de n-gramas o, si no, calculados."""
+        if isinstance(grams, dict):
+            return {n: g if isinstance(g, set) else set(g) for n, g in grams.items()}
+        try:
+            if isinstance(grams, (list, tuple, set)) and all(isinstance(x, str) for x in grams):
+                normalized: Dict[int, set[str]] = {}
+                for g in grams:
+                    normalized.setdefault(len(g), set()).add(g)
+                return normalized
+        except Exception:
+            pass
+        return self._build_query_grams(word, nrange)
+
     def _build_query_grams(self, q: str, nrange: Tuple[int, int]) -> Dict[int, set[str]]:
         """Construye n-gramas de la consulta"""
         gq: Dict[int, set[str]] = {}
@@ -225,51 +417,28 @@ class WordFinder:
             logger.error(f"Error construyendo n-gramas: {e}", exc_info=True)
             return []
 
-    def _ngram_similarity(self, a: str, b: str) -> float:
-        """Calcula la similitud entre dos n-gramas como la proporción de caracteres iguales."""
-        try:
-            matches = float(sum(1 for x, y in zip(a, b) if x == y))
-            # Normaliza por la longitud máxima para manejar n-gramas de longitudes distintas si fuera el caso.
-            return matches / float(max(len(a), len(b)))
-        except Exception as e:
-            logger.warning(f"Error comprobando texto: {e}", exc_info=True)
-            return 0.0
-
-    def _binary_cosine(self, size_a: int, size_b: int, soft_intersection: float) -> float:
-        """Calcula coseno binario entre dos conjuntos"""
-        if size_a == 0 or size_b == 0:
-            return 0.0
-        return soft_intersection / float((size_a * size_b) ** 0.5)
-
     def _score_binary_cosine_multi_n(self, grams_a: Dict[int, set[str]], grams_b: Dict[int, set[str]], nrange: Tuple[int, int]) -> float:
         """Calcula score ponderado por coseno binario multi-n-grama"""
-        num = 0.0
-        den = 0.0
+        soft: List[np.ndarray] = []
+        sizes_a: List[np.ndarray] = []
+        sizes_b: List[np.ndarray] = []
+        weights: List[float] = []
         for n in range(nrange[0], nrange[1] + 1):
             A = grams_a.get(n, set())
             B = grams_b.get(n, set())
-            w: float = self._get_weight_by_n(n)
-
-            if not A or not B:
-                den += w
-                continue
-
-            soft_intersection = 0.0
-            for gram_a in A:
-                max_sim = 0.0
-                for gram_b in B:
-                    sim = self._ngram_similarity(gram_a, gram_b)
-                    
-                    if sim > max_sim:
-                        max_sim = sim
-                soft_intersection += max_sim
-
-            num += w * self._binary_cosine(len(A), len(B), soft_intersection)
-            den += w
-
-        if den <= 0.0:
+            if A and B:
+                a_codes, a_lens = encode_grams(A)
+                b_codes, b_lens = encode_grams(B, pad=PAD_B)
+                soft.append(soft_intersections(a_codes, a_lens, np.zeros(len(a_codes), dtype=np.int64), 1,
+                                               b_codes[None], b_lens[None]))
+            else:
+                soft.append(np.zeros((1, 1), dtype=np.float64))
+            sizes_a.append(np.array([len(A)], dtype=np.float64))
+            sizes_b.append(np.array([len(B)], dtype=np.float64))
+            weights.append(self.n_weights[n])
+        if not soft:
             return 0.0
-        return num / den
+        return float(binary_cosine_scores(soft, sizes_a, sizes_b, weights)[0, 0])
 
     def _get_weight_by_n(self, n: int, default: float = 1.0) -> float:
         for start, end, value in self.weights_by_n:
@@ -279,76 +448,129 @@ class WordFinder:
 
     def _is_potential_keyword(self, q: str, nrange: Tuple[int, int]) -> bool:
         """Filtro rápido: suma de frecuencias normalizadas de n-gramas globales."""
-        try:
-            grams: List[str] = []
-            for n in range(nrange[0], nrange[1] + 1):
-                grams.extend(self._ngrams(q, n))
-            if not grams or self.global_counter is None or self.global_vocab is None:
-                return False
+        return self._potential_keywords([q], nrange)[0]
 
-            # Transforma el texto en matriz de n-gramas usando el vocabulario global
-            X = self.global_counter.transform([" ".join(grams)])
-            # Suma de frecuencias normalizadas
-            total = X.sum()
-            score = total / max(1, len(grams))
-
-            if score < self.global_filter_threshold:
-                logger.debug(f"Filtro rechazado para '{q}' Score={score:.4f}, ngrams={grams}")
-                return False
+    def _potential_keywords(self, queries: List[str], nrange: Tuple[int, int]) -> List[bool]:
+        """_is_potential_keyword para varios textos en una sola pasada."""
+        try:
+            if self.global_counter is None or self.global_vocab is None:
+                return [False] * len(queries)
+            all_grams: List[List[str]] = []
+            for q in queries:
+                grams: List[str] = []
+                for n in range(nrange[0], nrange[1] + 1):
+                    grams.extend(self._ngrams(q, n))
+                all_grams.append(grams)
+
+            if self.prefilter_table is not None:
+                totals = [self._prefilter_total(grams) for grams in all_grams]
             else:
-                logger.debug(f"Filtro pasado para '{q}' Score={score:.4f}, ngrams={grams}")
-                return score > self.global_filter_threshold
+                # Sin tabla compatible: una sola llamada a transform para todo el lote
+                totals = [0] * len(queries)
+                rows = [i for i, grams in enumerate(all_grams) if grams]
+                if rows:
+                    X = self.global_counter.transform([" ".join(all_grams[i]) for i in rows])
+                    for i, total in zip(rows, np.asarray(X.sum(axis=1)).ravel()):
+                        totals[i] = total
+
+            flags: List[bool] = []
+            for q, grams, total in zip(queries, all_grams, totals):
+                if not grams:
+                    flags.append(False)
+                    continue
+                # Suma de frecuencias normalizadas
+                score = total / max(1, len(grams))
+                if score < self.global_filter_threshold:
+                    logger.debug("Filtro rechazado para '%s' Score=%.4f, ngrams=%s", q, score, grams)
+                    flags.append(False)
+                else:
+                    logger.debug("Filtro pasado para '%s' Score=%.4f, ngrams=%s", q, score, grams)
+                    flags.append(score > self.global_filter_threshold)
+            return flags
 
         except Exception as e:
             logger.error("Error en filtro global: %s", e, exc_info=True)
-            return False
+            return [False] * len(queries)
 
-    def _is_forbidden(self, candidate: str) -> bool:
-        """Verifica si un candidato coincide con alguna palabra prohibida usando los mismos umbrales"""
-        nrange: Tuple[int, int] = self.ngr
+    def _compile_prefilter(self) -> None:
+        """
+        Compila el vocabulario de global_counter en una tabla n-grama -> features que produce,
+        para puntuar el filtro global con búsquedas en un dict en vez de CountVectorizer.transform.
+        Sólo aplica si el análisis del texto unido con espacios equivale al de cada n-grama por separado
+        (CountVectorizer de palabras, unigramas, patrón de tokens por defecto); si no, se usa transform.
+        """
+        self.prefilter_table: Optional[Dict[str, Tuple[int, ...]]] = None
+        counter = self.global_counter
+        if counter is None or self.global_vocab is None:
+            return
         try:
-            for i, noise_word in enumerate(self.noise_words):
-                if not noise_word:
-                    continue
-
-                noise_len = len(noise_word)
-                min_w = max(1, noise_len - self.window_flex)
-                if min_w > len(candidate):
-                    continue
-                max_w = min(len(candidate), noise_len + self.window_flex)
-
-                grams_forbidden = self.noise_grams[i]
-                if isinstance(grams_forbidden, dict):
-                    pass  # ya está en formato correcto
-                elif isinstance(grams_forbidden, (list, tuple, set)) and all(isinstance(x, str) for x in grams_forbidden): # type: ignore
-                    normalized: Dict[int, set[str]] = {}
-                    for g in grams_forbidden:
-                        normalized.setdefault(len(g), set()).add(g)
-                    grams_forbidden = normalized
-                else:
-                    grams_forbidden = self._build_query_grams(noise_word, nrange)
-
-                for w in range(min_w, max_w + 1):
-                    if w > len(candidate):
-                        break
-                    for j in range(0, len(candidate) - w + 1):
-                        sub = candidate[j:j + w]
-                        grams_sub = self._build_query_grams(sub, nrange)
-
-                        if sub == noise_word and len(sub) == noise_len:
-                            similarity = 1.0
-                        else:
-                            similarity = self._score_binary_cosine_multi_n(grams_forbidden, grams_sub, nrange)
-                            len_ratio = max(len(sub), noise_len) / max(1, min(len(sub), noise_len))
-                            if len_ratio >= 2.0:
-                                penalty = min(len(sub), noise_len) / max(len(sub), noise_len)
-                                similarity *= penalty
-
-                        if similarity > self.forb_match:
-                            logger.info(f"RUIDO: '{candidate}', Similitud: {similarity:.4f}, n-gramas: {grams_sub}")
-                            return True
+            from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+            compatible = (
+                isinstance(counter, CountVectorizer) and not isinstance(counter, TfidfVectorizer)
+                and counter.analyzer == "word" and tuple(counter.ngram_range) == (1, 1)
+                and counter.tokenizer is None and counter.preprocessor is None
+                and counter.token_pattern == CountVectorizer().token_pattern
+                and hasattr(counter, "vocabulary_")
+            )
+            if not compatible:
+                logger.info(f"Filtro global con transform: {type(counter).__name__} no admite tabla de n-gramas")
+                return
+            self._prefilter_analyzer = counter.build_analyzer()
+            self._prefilter_binary = bool(counter.binary)
+            self.prefilter_table = {}
+            for term in counter.vocabulary_:
+                self.prefilter_table[term] = self._prefilter_features(term)
+        except Exception as e:
+            logger.warning(f"No se pudo compilar la tabla del filtro global, se usa transform: {e}")
+            self.prefilter_table = None
+
+    def _prefilter_features(self, gram: str) -> Tuple[int, ...]:
+        vocabulary = self.global_counter.vocabulary_
+        return tuple(vocabulary[t] for t in self._prefilter_analyzer(gram) if t in vocabulary)
+
+    def _prefilter_total(self, grams: List[str]) -> int:
+        """Lo que sumaría transform([" ".join(grams)]): features del vocabulario de cada n-grama."""
+        table = self.prefilter_table
+        total = 0
+        seen: set[int] = set()
+        for g in grams:
+            features = table.get(g)
+            if features is None:
+                # N-grama fuera del vocabulario: se resuelve una vez y queda en la tabla
+                features = self._prefilter_features(g)
+                if len(table) < _MAX_PREFILTER_TABLE:
+                    table[g] = features
+            if self._prefilter_binary:
+                seen.update(features)
+            else:
+                total += len(features)
+        return len(seen) if self._prefilter_binary else total
 
-            return False
+    def _is_forbidden(self, candidate: str) -> bool:
+        """_check_forbidden memorizado (LRU acotado) por texto limpio"""
+        flag = self.forbidden_cache.get(candidate)
+        if flag is None:
+            flag = self._check_forbidden(candidate)
+            self.forbidden_cache.put(candidate, flag)
+        return flag
+
+    def _check_forbidden(self, candidate: str, log_level: int = logging.INFO) -> bool:
+        """
+        Verifica si un candidato coincide con alguna palabra prohibida usando los mismos umbrales.
+        Al precompilar las palabras del modelo se registra en debug (log_level) para no llenar el log en cada carga.
+        """
+        noise = self.compiled_noise
+        try:
+            ids = [i for i, noise_word in enumerate(noise.words) if noise_word and noise.min_w[i] <= len(candidate)]
+            hits = self._score_windows(QueryGrams(candidate, noise.nrange), noise, ids, self.forb_match)
+            if not hits:
+                return False
+            # La primera coincidencia en el orden palabra prohibida -> ancho -> posición
+            _, w, j, similarity = min(hits)
+            if logger.isEnabledFor(log_level):
+                grams_sub = self._build_query_grams(candidate[j:j + w], noise.nrange)
+                logger.log(log_level, f"RUIDO: '{candidate}', Similitud: {similarity:.4f}, n-gramas: {grams_sub}")
+            return True
         except Exception as e:
             logger.error(f"Error verificando palabra prohibida: {e}", exc_info=True)
             return False
@@ -378,6 +600,10 @@ class WordFinder:
             logger.error(msg=f"Error limpiando texto: {e}", exc_info=True)
         return None
 
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Tamaño, aciertos, fallos y tasa de aciertos de los cachés de resultados y de ruido."""
+        return {"results": self.result_cache.stats(), "forbidden": self.forbidden_cache.stats()}
+
     def get_model_info(self) -> Dict[str, Any]:
         return {
             "noise_words": self.noise_words
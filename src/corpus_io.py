@@ -0,0 +1,253 @@
+import os
+import glob
+import json
+import logging
+from typing import List, Any, Dict, Iterator, Optional, Tuple
+from src.json_stream import iter_polygons
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:  # pyarrow es opcional: sin él sólo hay JSON y NDJSON
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Columnas del formato tabular; las mismas claves que el JSON anidado de input/
+ID_COLUMN = "poly_id"
+TEXT_COLUMN = "text"
+LABEL_COLUMN = "semantic_clasification"
+# Documento de origen (nombre del archivo sin extensión) en los corpus que juntan varios documentos:
+# los poly_id sólo son únicos dentro de cada documento
+DOCUMENT_COLUMN = "document"
+
+FORMATS: Dict[str, str] = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+_BATCH_SIZE = 8192
+
+def corpus_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Formato de corpus no soportado: {path}")
+    return FORMATS[ext]
+
+def list_corpus_files(folder: str) -> List[str]:
+    """Archivos de corpus de la carpeta: primero los .json (en orden de glob), luego los demás formatos."""
+    files: List[str] = []
+    for ext in FORMATS:
+        files.extend(glob.glob(os.path.join(folder, f"*{ext}")))
+    return files
+
+def _require_pyarrow(path: str) -> None:
+    if pa is None:
+        raise ImportError(f"Se necesita pyarrow para leer o escribir {path}")
+
+def iter_batches(path: str, batch_size: int = _BATCH_SIZE) -> Iterator[Tuple[List[str], List[Any], List[Any]]]:
+    """
+    Lotes (poly_ids, textos, etiquetas) de un corpus en cualquier formato soportado.
+    Arrow se abre con memoria mapeada y Parquet se lee por grupos de filas: sólo se
+    convierte a objetos de Python el lote en curso. Sin columna de etiqueta se usa 0,
+    igual que en el JSON anidado.
+    """
+    for _, ids, texts, labels in iter_document_batches(path, batch_size):
+        yield ids, texts, labels
+
+def iter_document_batches(path: str, batch_size: int = _BATCH_SIZE) -> Iterator[Tuple[Optional[List[Any]], List[str], List[Any], List[Any]]]:
+    """
+    Como iter_batches, con la columna document delante: None si el corpus no la tiene
+    (un solo documento, p. ej. el JSON anidado de input/).
+    """
+    fmt = corpus_format(path)
+    if fmt in ("json", "ndjson"):
+        docs: List[Any] = []
+        ids: List[str] = []
+        texts: List[Any] = []
+        labels: List[Any] = []
+        records = ((None, *record) for record in iter_polygons(path)) if fmt == "json" else _iter_ndjson(path)
+        for document, poly_id, text, label in records:
+            docs.append(document)
+            ids.append(poly_id)
+            texts.append(text)
+            labels.append(label)
+            if len(ids) == batch_size:
+                yield _documents(docs), ids, texts, labels
+                docs, ids, texts, labels = [], [], [], []
+        if ids:
+            yield _documents(docs), ids, texts, labels
+        return
+
+    _require_pyarrow(path)
+    if fmt == "parquet":
+        parquet = pq.ParquetFile(path)
+        names = set(parquet.schema_arrow.names)
+        columns = [c for c in (DOCUMENT_COLUMN, ID_COLUMN, TEXT_COLUMN, LABEL_COLUMN) if c in names]
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            yield _batch_columns(batch)
+        return
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        for batch in table.to_batches(max_chunksize=batch_size):
+            yield _batch_columns(batch)
+
+def _documents(docs: List[Any]) -> Optional[List[Any]]:
+    return None if all(d is None for d in docs) else docs
+
+def iter_records(path: str, batch_size: int = _BATCH_SIZE) -> Iterator[Tuple[str, Any, Any]]:
+    """(poly_id, texto, etiqueta) fila a fila sobre iter_batches."""
+    for ids, texts, labels in iter_batches(path, batch_size):
+        yield from zip(ids, texts, labels)
+
+def _batch_columns(batch: Any) -> Tuple[Optional[List[Any]], List[str], List[Any], List[Any]]:
+    n = batch.num_rows
+    names = batch.schema.names
+    docs = batch.column(names.index(DOCUMENT_COLUMN)).to_pylist() if DOCUMENT_COLUMN in names else None
+    texts = batch.column(names.index(TEXT_COLUMN)).to_pylist()
+    ids = batch.column(names.index(ID_COLUMN)).to_pylist() if ID_COLUMN in names else [str(i) for i in range(n)]
+    labels = batch.column(names.index(LABEL_COLUMN)).to_pylist() if LABEL_COLUMN in names else [0] * n
+    return docs, ids, texts, labels
+
+def _iter_ndjson(path: str) -> Iterator[Tuple[Any, str, Any, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            if not line.strip():
+                continue
+            row: Dict[str, Any] = json.loads(line)
+            yield row.get(DOCUMENT_COLUMN), str(row.get(ID_COLUMN, line_no)), row.get(TEXT_COLUMN, ""), row.get(LABEL_COLUMN, 0)
+
+class CorpusWriter:
+    """
+    Escritura por lotes en el formato que indique la extensión.
+    Cada lote es un dict columna -> lista; la columna poly_id es obligatoria.
+    En JSON anidado cada fila queda como poly_id -> {resto de columnas}: un poly_id repetido
+    pisa al anterior, así que los corpus con varios documentos (columna document) no se escriben en JSON.
+    types fija el tipo Arrow de columnas que podrían llegar todo nulas en el primer lote (p. ej. {"probability": "float64"}).
+    """
+    def __init__(self, path: str, types: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.format = corpus_format(path)
+        self.types: Dict[str, str] = {DOCUMENT_COLUMN: "string", ID_COLUMN: "string", TEXT_COLUMN: "string", LABEL_COLUMN: "int64", **(types or {})}
+        self.rows = 0
+        self._file: Any = None
+        self._writer: Any = None
+        self._schema: Any = None
+        if self.format in ("parquet", "arrow"):
+            _require_pyarrow(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        if self.format in ("json", "ndjson"):
+            self._file = open(self._tmp_path, "w", encoding="utf-8")
+            if self.format == "json":
+                self._file.write("{")
+
+    def write_batch(self, columns: Dict[str, List[Any]]) -> None:
+        if ID_COLUMN not in columns:
+            raise ValueError(f"Falta la columna '{ID_COLUMN}'")
+        n = len(columns[ID_COLUMN])
+        if not n:
+            return
+
+        if self.format == "json":
+            if DOCUMENT_COLUMN in columns:
+                raise ValueError(f"{self.path}: el JSON anidado no admite varios documentos (poly_id repetidos); usa ndjson, parquet o arrow")
+            others = [c for c in columns if c != ID_COLUMN]
+            for i, poly_id in enumerate(columns[ID_COLUMN]):
+                value = {c: columns[c][i] for c in others}
+                sep = "," if self.rows + i else ""
+                self._file.write(f"{sep}\n{json.dumps(str(poly_id), ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}")
+        elif self.format == "ndjson":
+            names = list(columns)
+            for i in range(n):
+                self._file.write(json.dumps({c: columns[c][i] for c in names}, ensure_ascii=False) + "\n")
+        else:
+            if self._schema is None:
+                arrays = [pa.array(values, type=pa.type_for_alias(self.types[c]) if c in self.types else None) for c, values in columns.items()]
+                batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+            else:
+                batch = pa.RecordBatch.from_pydict(columns, schema=self._schema)
+            if self._writer is None:
+                self._schema = batch.schema
+                if self.format == "parquet":
+                    self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self._tmp_path, self._schema)
+            if self.format == "parquet":
+                self._writer.write_batch(batch)
+            else:
+                self._writer.write(batch)
+        self.rows += n
+
+    def close(self) -> None:
+        if self.format == "json":
+            self._file.write("\n}")
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+        elif self.format in ("parquet", "arrow"):
+            # Archivo vacío: sólo se puede escribir con el esquema mínimo
+            schema = pa.schema([(ID_COLUMN, pa.string()), (TEXT_COLUMN, pa.string())])
+            empty = pa.Table.from_pylist([], schema=schema)
+            if self.format == "parquet":
+                pq.write_table(empty, self._tmp_path)
+            else:
+                with pa.ipc.new_file(self._tmp_path, schema) as writer:
+                    writer.write_table(empty)
+        os.replace(self._tmp_path, self.path)
+        logger.debug(f"{self.rows} filas escritas en {self.path}")
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_corpus(path: str, columns: Dict[str, List[Any]]) -> None:
+    with CorpusWriter(path) as writer:
+        writer.write_batch(columns)
+
+def convert_corpus(src_path: str, dst_path: str, batch_size: int = _BATCH_SIZE, writer: Optional[CorpusWriter] = None,
+                   document: Optional[str] = None) -> int:
+    """
+    Copia poly_id, texto y etiqueta de src_path a dst_path (o a un writer abierto). Devuelve las filas.
+    Con `document` (o si src_path ya trae la columna) se escribe también la columna document.
+    """
+    rows = 0
+    own_writer = writer is None
+    out = CorpusWriter(dst_path) if writer is None else writer
+    try:
+        for docs, ids, texts, labels in iter_document_batches(src_path, batch_size):
+            # Los formatos columnares exigen un tipo por columna: textos que no son str quedan nulos
+            texts = [t if t is None or isinstance(t, str) else None for t in texts]
+            columns: Dict[str, List[Any]] = {ID_COLUMN: ids, TEXT_COLUMN: texts, LABEL_COLUMN: labels}
+            if docs is None and document is not None:
+                docs = [document] * len(ids)
+            if docs is not None:
+                columns = {DOCUMENT_COLUMN: docs, **columns}
+            out.write_batch(columns)
+            rows += len(ids)
+    except Exception:
+        if own_writer:
+            out.abort()
+        raise
+    if own_writer:
+        out.close()
+    return rows
@@ -0,0 +1,83 @@
+import os
+import glob
+import json
+import hashlib
+import logging
+import numpy as np
+import lightgbm as lgb
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de model_config que cambian el binning del Dataset: no se pueden variar sin reconstruirlo
+DATASET_PARAMS = ("max_bin", "max_bin_by_feature", "min_data_in_bin", "bin_construct_sample_cnt", "feature_pre_filter",
+                  "categorical_feature", "linear_tree", "use_missing", "zero_as_missing")
+# Con feature_pre_filter (activo por defecto) el Dataset descarta al construirse las features que no admiten
+# un split con estos mínimos por hoja; con feature_pre_filter=False no le afectan y se pueden variar
+PRE_FILTER_PARAMS = ("min_data_in_leaf", "min_sum_hessian_in_leaf")
+# Pares train/valid que se conservan; los más antiguos se borran
+_MAX_ENTRIES = 4
+
+def dataset_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parámetros de params que determinan el Dataset construido."""
+    names = DATASET_PARAMS + (PRE_FILTER_PARAMS if params.get("feature_pre_filter", True) else ())
+    return {k: params[k] for k in names if k in params}
+
+class DatasetCache:
+    """
+    Datasets de LightGBM ya construidos (binned) guardados en su formato binario.
+    La clave es el hash de X/y de train y validación, los parámetros del split y los de binning,
+    así cualquier cambio en las features o en el split genera un par nuevo.
+    """
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(arrays: Tuple[np.ndarray, ...], split: Dict[str, Any], params: Dict[str, Any]) -> str:
+        sha = hashlib.sha256()
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            sha.update(f"{array.dtype.str}{array.shape}".encode("utf-8"))
+            sha.update(array.data)
+        binning = dataset_params(params)
+        sha.update(json.dumps({"split": split, "binning": binning, "lightgbm": lgb.__version__}, sort_keys=True, default=str).encode("utf-8"))
+        return sha.hexdigest()
+
+    def load_or_build(self, X_train: np.ndarray, y_train: np.ndarray, X_valid: np.ndarray, y_valid: np.ndarray,
+                      split: Dict[str, Any], params: Dict[str, Any]) -> Tuple[lgb.Dataset, lgb.Dataset]:
+        """(train, valid) desde los binarios si la clave coincide; si no, los construye y los guarda."""
+        key = self.key((X_train, y_train, X_valid, y_valid), split, params)
+        train_path = os.path.join(self.cache_dir, f"{key}-train.bin")
+        valid_path = os.path.join(self.cache_dir, f"{key}-valid.bin")
+        construct_params = dataset_params(params)
+        if "verbosity" in params:
+            construct_params["verbosity"] = params["verbosity"]
+
+        if os.path.exists(train_path) and os.path.exists(valid_path):
+            try:
+                train_data = lgb.Dataset(train_path, params=construct_params).construct()
+                valid_data = lgb.Dataset(valid_path, reference=train_data, params=construct_params).construct()
+                logger.info(f"Datasets binarios reutilizados: {key[:16]}")
+                return train_data, valid_data
+            except Exception as e:
+                logger.warning(f"Datasets binarios inválidos, se reconstruyen: {e}")
+
+        train_data = lgb.Dataset(X_train, label=y_train, params=construct_params).construct()
+        valid_data = lgb.Dataset(X_valid, label=y_valid, reference=train_data, params=construct_params).construct()
+        try:
+            for dataset, path in ((train_data, train_path), (valid_data, valid_path)):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                dataset.save_binary(tmp_path)
+                os.replace(tmp_path, path)
+            self._prune()
+        except Exception as e:
+            logger.error(f"No se pudieron guardar los datasets binarios: {e}", exc_info=True)
+        return train_data, valid_data
+
+    def _prune(self) -> None:
+        entries = sorted(glob.glob(os.path.join(self.cache_dir, "*-train.bin")), key=os.path.getmtime, reverse=True)
+        for train_path in entries[_MAX_ENTRIES:]:
+            for path in (train_path, train_path[:-len("-train.bin")] + "-valid.bin"):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,159 @@
+import json
+import hashlib
+import logging
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple, Union
+from src.bounded_cache import BoundedCache
+
+logger = logging.getLogger(__name__)
+
+# Secciones de params.encoders de las que dependen las tablas (y su hash)
+TABLE_SECTIONS: Tuple[str, ...] = ("char_num", "density_encoder", "inv_encoder_density")
+
+_BMP_SIZE = 0x10000
+_ALPHA_BMP: Optional[np.ndarray] = None
+_MONEY_CHARS = frozenset(".$,")
+
+# Código de carácter que obliga al kernel fusionado a usar la ruta de referencia
+FALLBACK_CODE: Tuple[Any, ...] = ()
+
+CharCode = Tuple[float, float, float, int, int, int]
+
+class EncoderTables:
+    """
+    Encoders de config.yaml compilados una sola vez en tablas densas indexadas por codepoint.
+    Se obtienen con get_encoder_tables, que las cachea por hash de configuración.
+    """
+    def __init__(self, encoders: Dict[str, Any], config_hash: str):
+        self.config_hash = config_hash
+        self.char_num: frozenset[str] = frozenset(
+            ch for ch in encoders.get("char_num", []) if isinstance(ch, str) and len(ch) == 1
+        )
+        self.density_map: Dict[str, float] = {k: float(v) for k, v in encoders.get("density_encoder", {}).items()}
+        self.inv_density_map: Dict[str, float] = {k: float(v) for k, v in encoders.get("inv_encoder_density", {}).items()}
+
+        self.density = _codepoint_table(self.density_map)
+        self.inv_density = _codepoint_table(self.inv_density_map)
+        self.num_mask = _codepoint_table({ch: 1.0 for ch in self.char_num}) > 0
+
+        # Morfología para el plano básico: 1 numérico, -1 alfabético, 0 resto
+        num_bmp = np.zeros(_BMP_SIZE, dtype=bool)
+        n_num = min(self.num_mask.shape[0] - 1, _BMP_SIZE)
+        num_bmp[:n_num] = self.num_mask[:n_num]
+        self.morph = np.where(num_bmp, 1.0, np.where(_alpha_bmp(), -1.0, 0.0)).astype(np.float32)
+
+        # Tabla str.translate que elimina los caracteres de char_num
+        self.drop_num: Dict[int, None] = {ord(ch): None for ch in self.char_num}
+
+        # Códigos por carácter para el kernel fusionado, se rellenan bajo demanda
+        self.char_codes: Dict[str, Optional[CharCode]] = {}
+        values = list(self.density_map.values()) + list(self.inv_density_map.values())
+        self.integral_values = all(float(v).is_integer() for v in values)
+        self.max_abs_value = max((abs(v) for v in values), default=0.0)
+        # str.lower() sólo depende del contexto en la sigma final
+        self.sigma_safe = all(
+            m.get("σ", 0.0) == m.get("ς", 0.0) for m in (self.density_map, self.inv_density_map)
+        )
+
+    def codepoints(self, text: str) -> np.ndarray:
+        return np.frombuffer(text.encode("utf-32-le"), dtype="<u4").astype(np.int64)
+
+    def lookup(self, table: np.ndarray, cps: np.ndarray) -> np.ndarray:
+        """Valor de cada codepoint; los que no están en la tabla valen 0."""
+        return table[np.minimum(cps, table.shape[0] - 1)]
+
+    def morph_of(self, cps: np.ndarray) -> np.ndarray:
+        """Codificación morfológica vectorizada; los codepoints fuera del plano básico se resuelven uno a uno."""
+        values = self.morph[np.minimum(cps, _BMP_SIZE - 1)]
+        for i in np.flatnonzero(cps >= _BMP_SIZE):
+            ch = chr(int(cps[i]))
+            values[i] = 1.0 if ch in self.char_num else (-1.0 if ch.isalpha() else 0.0)
+        return values
+
+    def char_code(self, ch: str) -> Optional[CharCode]:
+        """
+        (densidad, densidad inversa, morfología, es_num, es_alfa, es_moneda) de un carácter, memoizado.
+        Devuelve None para espacios y FALLBACK_CODE si su minúscula no es un único carácter estable.
+        """
+        code: Optional[CharCode]
+        lower = ch.lower()
+        if ch.isspace():
+            code = None
+        elif len(lower) != 1 or (ch == "Σ" and not self.sigma_safe):
+            code = FALLBACK_CODE
+        else:
+            is_num = ch in self.char_num
+            is_alpha = not is_num and ch.isalpha()
+            code = (
+                self.density_map.get(lower, 0.0),
+                self.inv_density_map.get(lower, 0.0),
+                1.0 if is_num else (-1.0 if is_alpha else 0.0),
+                int(is_num),
+                int(is_alpha),
+                int(ch in _MONEY_CHARS),
+            )
+        self.char_codes[ch] = code
+        return code
+
+    def count_numeric(self, compact: str) -> int:
+        return len(compact) - len(compact.translate(self.drop_num))
+
+    def count_alpha(self, compact: str) -> int:
+        """Caracteres alfabéticos que no pertenecen a char_num."""
+        return sum(map(str.isalpha, compact.translate(self.drop_num)))
+
+_TABLES_BY_HASH: Dict[str, EncoderTables] = {}
+# Atajo por id() del dict (el hash de la config cuesta ~190µs, más que las features de un polígono).
+# Guarda el dict para que su id no se reutilice mientras está en caché: como mucho _MAX_ID_ENTRIES fijados
+_MAX_ID_ENTRIES = 32
+_TABLES_BY_ID = BoundedCache(_MAX_ID_ENTRIES, "lru")
+
+def encoder_config_hash(encoders: Dict[str, Any]) -> str:
+    """Hash estable de las secciones de encoders usadas por las tablas."""
+    payload = {name: encoders.get(name) for name in TABLE_SECTIONS}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def get_encoder_tables(encoders: Union[Dict[str, Any], EncoderTables]) -> EncoderTables:
+    """
+    Devuelve las tablas compiladas para un dict de encoders.
+    El mismo objeto dict se resuelve sin recalcular el hash; configs iguales comparten tablas.
+    El dict no debe modificarse en el sitio después de usarlo: seguiría resolviendo a las tablas
+    anteriores. Para cambiar la config usa un dict nuevo o llama antes a clear_encoder_tables().
+    """
+    if isinstance(encoders, EncoderTables):
+        return encoders
+
+    hit = _TABLES_BY_ID.get(id(encoders))
+    if hit is not None and hit[0] is encoders:
+        return hit[1]
+
+    config_hash = encoder_config_hash(encoders)
+    tables = _TABLES_BY_HASH.get(config_hash)
+    if tables is None:
+        tables = EncoderTables(encoders, config_hash)
+        _TABLES_BY_HASH[config_hash] = tables
+        logger.debug(f"Tablas de encoders compiladas: {config_hash}")
+
+    _TABLES_BY_ID.put(id(encoders), (encoders, tables))
+    return tables
+
+def clear_encoder_tables() -> None:
+    """Olvida las tablas compiladas y los dicts fijados (p. ej. tras modificar en el sitio un dict de encoders)."""
+    _TABLES_BY_ID.clear()
+    _TABLES_BY_HASH.clear()
+
+def _codepoint_table(encoder: Dict[str, float]) -> np.ndarray:
+    """Tabla densa indexada por codepoint; la última posición (0.0) absorbe los caracteres desconocidos."""
+    keys: List[str] = [k for k in encoder if isinstance(k, str) and len(k) == 1]
+    size = max((ord(k) for k in keys), default=0) + 2
+    table = np.zeros(size, dtype=np.float32)
+    for k in keys:
+        table[ord(k)] = float(encoder[k])
+    return table
+
+def _alpha_bmp() -> np.ndarray:
+    global _ALPHA_BMP
+    if _ALPHA_BMP is None:
+        _ALPHA_BMP = np.array([chr(c).isalpha() for c in range(_BMP_SIZE)], dtype=bool)
+    return _ALPHA_BMP
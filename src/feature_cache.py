@@ -0,0 +1,81 @@
+import os
+import hashlib
+import logging
+import numpy as np
+from typing import List, Any, Dict, Optional, Tuple
+from src.calculate_features import FEATURE_NAMES
+from src.encoder_tables import encoder_config_hash
+
+logger = logging.getLogger(__name__)
+
+# Subir si cambia la definición de las features para invalidar todas las entradas
+FEATURE_CACHE_VERSION = 1
+_READ_BLOCK = 1 << 20
+
+class FeatureCache:
+    """
+    Caché de features por archivo de entrenamiento, direccionada por contenido:
+    la clave es el hash del archivo más el hash de los encoders, así un archivo editado
+    o un cambio de encoders nunca reutiliza features viejas. Cada entrada es un .npz.
+    """
+    def __init__(self, cache_dir: str, encoders: Dict[str, Any]):
+        self.cache_dir = cache_dir
+        self.encoder_hash = encoder_config_hash(encoders)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_READ_BLOCK), b""):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def entry_path(self, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}-{self.encoder_hash[:16]}-v{FEATURE_CACHE_VERSION}.npz")
+
+    def load(self, file_hash: str) -> Optional[Tuple[List[str], np.ndarray, np.ndarray]]:
+        """(textos, etiquetas originales, features) o None si no hay entrada válida."""
+        path = self.entry_path(file_hash)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                blob = data["text_blob"].tobytes()
+                offsets = data["text_offsets"]
+                labels = data["labels"]
+                features = data["features"]
+            if features.shape != (labels.shape[0], len(FEATURE_NAMES)):
+                raise ValueError(f"Forma inesperada {features.shape}")
+            texts = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(labels.shape[0])]
+        except Exception as e:
+            logger.warning(f"Entrada de caché inválida, se recalcula: {path}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return texts, labels, features
+
+    def save(self, file_hash: str, texts: List[str], labels: List[int], features: np.ndarray) -> None:
+        # Textos como UTF-8 concatenado + offsets: numpy recorta los '\x00' finales de los arreglos '<U'
+        encoded = [t.encode("utf-8") for t in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        path = self.entry_path(file_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    text_blob=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+                    text_offsets=offsets,
+                    labels=np.asarray(labels, dtype=np.int32),
+                    features=np.asarray(features, dtype=np.float32),
+                )
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"No se pudo guardar la caché {path}: {e}", exc_info=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
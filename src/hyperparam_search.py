@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import pickle
+import random
+import logging
+import itertools
+import numpy as np
+import lightgbm as lgb
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.model_selection import StratifiedKFold
+from typing import List, Any, Dict, Optional, Tuple
+from src.train_model import TrainModel
+from src.model_bundle import save_model_bundle
+from src.dataset_cache import DATASET_PARAMS
+
+logger = logging.getLogger(__name__)
+
+_HIGHER_IS_BETTER = ("auc", "auc_mu", "ndcg", "map", "average_precision")
+
+# Dataset binario y folds cargados una vez por proceso worker
+_worker_dataset: Optional[lgb.Dataset] = None
+_worker_folds: List[Tuple[np.ndarray, np.ndarray]] = []
+
+def _init_search_worker(binary_path: str, dataset_params: Dict[str, Any], folds: List[Tuple[np.ndarray, np.ndarray]]) -> None:
+    global _worker_dataset, _worker_folds
+    # Mismos parámetros con los que se construyó: con feature_pre_filter distinto lgb.cv rechaza el Dataset
+    _worker_dataset = lgb.Dataset(binary_path, params=dataset_params).construct()
+    _worker_folds = folds
+
+def _evaluate_candidate(job: Tuple[int, Dict[str, Any], Dict[str, Any]]) -> Dict[str, Any]:
+    """Validación cruzada de un candidato sobre el Dataset ya binned del worker."""
+    if _worker_dataset is None:
+        raise RuntimeError("Worker sin Dataset inicializado")
+    index, params, run = job
+    time0 = time.perf_counter()
+    results = lgb.cv(
+        params,
+        _worker_dataset,
+        num_boost_round=run["num_boost_round"],
+        folds=_worker_folds,
+        callbacks=[lgb.early_stopping(stopping_rounds=run["early_stopping_rounds"], verbose=False)],
+    )
+    metric = run["metric"]
+    mean = results[f"valid {metric}-mean"]
+    stdv = results[f"valid {metric}-stdv"]
+    return {
+        "index": index,
+        "overrides": run["overrides"],
+        "score": float(mean[-1]),
+        "stdv": float(stdv[-1]),
+        "best_rounds": len(mean),
+        "seconds": time.perf_counter() - time0,
+        "pid": os.getpid(),
+    }
+
+class HyperparamSearch:
+    """
+    Búsqueda de model_config con validación cruzada estratificada.
+    Las features y el lgb.Dataset binned se construyen una sola vez; los candidatos se reparten
+    entre procesos que cargan el Dataset binario y usan num_threads = núcleos // workers.
+    """
+    def __init__(self, config: Dict[str, Dict[str, Any]], project_root: str, label_path: str, output_dir: str):
+        self.config = config
+        self.project_root = project_root
+        self.label_path = label_path
+        self.output_dir = output_dir
+        self.params = self.config.get("params", {})
+        self.encoders = self.params.get("encoders", {})
+        self.model_config: Dict[str, Any] = dict(self.params.get("model_config", {}))
+        self.search: Dict[str, Any] = self.params.get("search", {}) or {}
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Producto cartesiano de search.grid, o random_samples combinaciones al azar (semilla fija)."""
+        grid: Dict[str, List[Any]] = self.search.get("grid", {}) or {}
+        fixed = [name for name in grid if name in DATASET_PARAMS]
+        if fixed:
+            raise ValueError(f"Parámetros de binning no se pueden buscar con un Dataset compartido: {fixed}")
+        names = list(grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+        samples = int(self.search.get("random_samples", 0) or 0)
+        if 0 < samples < len(combos):
+            combos = random.Random(int(self.search.get("seed", 42))).sample(combos, samples)
+        return combos or [{}]
+
+    def run(self) -> Dict[str, Any]:
+        time0 = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        feature_set = TrainModel(self.config, self.project_root, self.label_path).generate_features()
+        X, y = feature_set.X, feature_set.y_mapped
+        logger.info(f"Features para la búsqueda: {X.shape[0]} filas en {time.perf_counter()-time0:.4f}s")
+
+        # Binning una sola vez; feature_pre_filter=False permite variar min_data_in_leaf por candidato
+        dataset_params = {k: v for k, v in self.model_config.items() if k in DATASET_PARAMS}
+        dataset_params.update(feature_pre_filter=False, verbosity=-1)
+        binary_path = os.path.join(self.output_dir, "train.bin")
+        if os.path.exists(binary_path):
+            os.remove(binary_path)
+        dataset = lgb.Dataset(X, label=y, params=dataset_params, free_raw_data=False).construct()
+        dataset.save_binary(binary_path)
+
+        n_folds = int(self.search.get("folds", 5))
+        seed = int(self.search.get("seed", 42))
+        folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X, y))
+
+        candidates = self.candidates()
+        cores = os.cpu_count() or 1
+        workers = self.search.get("workers")
+        workers = max(1, min(int(workers) if workers else cores, len(candidates)))
+        num_threads = max(1, cores // workers)
+        metric = str(self.model_config.get("metric", "multi_logloss"))
+        logger.info(f"{len(candidates)} candidatos, {n_folds} folds, {workers} workers x {num_threads} hilos")
+
+        jobs: List[Tuple[int, Dict[str, Any], Dict[str, Any]]] = []
+        for index, overrides in enumerate(candidates):
+            params = {**self.model_config, **overrides, "num_threads": num_threads, "verbosity": -1, "feature_pre_filter": False}
+            run = {
+                "overrides": overrides,
+                "metric": metric,
+                "num_boost_round": int(self.search.get("num_boost_round", 100)),
+                "early_stopping_rounds": int(self.search.get("early_stopping_rounds", 10)),
+            }
+            jobs.append((index, params, run))
+
+        if workers == 1:
+            _init_search_worker(binary_path, dataset_params, folds)
+            results = [_evaluate_candidate(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker, initargs=(binary_path, dataset_params, folds)) as pool:
+                results = list(pool.map(_evaluate_candidate, jobs))
+
+        higher_is_better = metric in _HIGHER_IS_BETTER
+        ranked = sorted(results, key=lambda r: (-r["score"] if higher_is_better else r["score"], r["index"]))
+        for rank, result in enumerate(ranked, start=1):
+            result["rank"] = rank
+            logger.info(f"#{rank} {metric}={result['score']:.6f} ±{result['stdv']:.6f} rondas={result['best_rounds']} {result['overrides']}")
+
+        best = ranked[0]
+        best_params = {**self.model_config, **best["overrides"]}
+        model = self._train_best(dataset, best_params, best["best_rounds"], num_threads=cores)
+
+        report = {
+            "created": datetime.now().isoformat(),
+            "metric": metric,
+            "higher_is_better": higher_is_better,
+            "folds": n_folds,
+            "rows": int(X.shape[0]),
+            "workers": workers,
+            "num_threads": num_threads,
+            "seconds": time.perf_counter() - time0,
+            "best_params": best_params,
+            "best_rounds": best["best_rounds"],
+            "results": ranked,
+        }
+        with open(os.path.join(self.output_dir, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Búsqueda terminada en {report['seconds']:.2f}s; reporte y mejor modelo en: {self.output_dir}")
+        return {"report": report, "model": model}
+
+    def _train_best(self, dataset: lgb.Dataset, params: Dict[str, Any], rounds: int, num_threads: int) -> lgb.Booster:
+        """Reentrena el mejor candidato con todos los datos y las rondas que eligió la validación cruzada."""
+        model = lgb.train({**params, "num_threads": num_threads, "verbosity": -1, "feature_pre_filter": False}, dataset, num_boost_round=rounds)
+        with open(os.path.join(self.output_dir, "best_model.pkl"), "wb") as f:
+            pickle.dump(model, f)
+        save_model_bundle(os.path.join(self.output_dir, "best_model"), model, self.encoders,
+                          extra={"search": {"params": params, "rounds": rounds}})
+        return model
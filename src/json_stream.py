@@ -0,0 +1,92 @@
+import re
+import json
+import logging
+from typing import Any, Iterator, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\r\n"
+_NON_WHITESPACE = re.compile(r"[^ \t\r\n]")
+
+class _JsonStream:
+    """Ventana sobre un archivo de texto: sólo guarda lo que falta por decodificar."""
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self) -> bool:
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read():
+                raise ValueError("Fin de archivo inesperado en el JSON")
+
+    def expect(self, char: str) -> None:
+        got = self.peek()
+        if got != char:
+            raise ValueError(f"Se esperaba '{char}' y se encontró '{got}'")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        """Decodifica el siguiente valor, leyendo más bloques mientras esté incompleto."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                if self.eof or self._complete(value, end):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read()
+
+    def _complete(self, value: Any, end: int) -> bool:
+        """Un número cortado por el bloque ("-1." de "-1.5") también decodifica: hay que ver el delimitador."""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return True
+        match = _NON_WHITESPACE.search(self.buf, end)
+        return match is not None and self.buf[match.start()] in ",}]"
+
+def iter_json_object(f: TextIO, chunk_size: int = _CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """Pares (clave, valor) del objeto JSON de nivel superior, sin cargar todo el documento."""
+    stream = _JsonStream(f, chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.decode()
+        if not isinstance(key, str):
+            raise ValueError(f"Clave no válida en el objeto JSON: {key!r}")
+        stream.expect(":")
+        yield key, stream.decode()
+        if stream.peek() == "}":
+            return
+        stream.expect(",")
+
+def iter_polygons(file_path: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[Tuple[str, Any, Any]]:
+    """
+    Recorre un documento poly_id -> {text, semantic_clasification} polígono a polígono.
+    Produce (poly_id, text, label) tal como vienen en el archivo; omite polígonos vacíos.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        for poly_id, poly_data in iter_json_object(f, chunk_size):
+            if not poly_data:
+                continue
+            yield poly_id, poly_data.get("text", ""), poly_data.get("semantic_clasification", 0)
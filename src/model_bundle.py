@@ -0,0 +1,98 @@
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+from typing import List, Any, Dict, Optional
+from src.calculate_features import FEATURE_NAMES
+from src.encoder_tables import encoder_config_hash
+from src.tree_compiler import CompiledForest
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+LIGHTGBM_FILE = "model.txt"
+TREES_DIR = "trees"
+
+class ModelBundle:
+    """
+    Artefacto versionado del clasificador: modelo nativo de LightGBM, árboles compilados en .npy
+    (memoria mapeada, sólo lectura) y el manifiesto con el que se entrenó.
+    """
+    def __init__(self, path: str, manifest: Dict[str, Any], forest: CompiledForest):
+        self.path = path
+        self.manifest = manifest
+        self.forest = forest
+        self.feature_names: List[str] = manifest["feature_names"]
+        self.encoder_hash: str = manifest["encoder_hash"]
+        self.trained_at: str = manifest["trained_at"]
+        self.conversion_map: Dict[int, int] = {int(k): int(v) for k, v in manifest["conversion_map"].items()}
+
+    def load_booster(self) -> Any:
+        """Booster de LightGBM (importa lightgbm sólo aquí)."""
+        import lightgbm as lgb
+        return lgb.Booster(model_file=os.path.join(self.path, LIGHTGBM_FILE))
+
+def is_model_bundle(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+def save_model_bundle(path: str, booster: Any, encoders: Dict[str, Any], trained_at: Optional[str] = None,
+                      extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Escribe el bundle en un directorio temporal y lo sustituye completo al final."""
+    conversion: Dict[str, int] = {}
+    for item in encoders.get("conversion_map", []):
+        for k, v in item.items():
+            conversion[str(int(k))] = int(v)
+
+    forest = CompiledForest.from_booster(booster)
+    manifest: Dict[str, Any] = {
+        "format_version": BUNDLE_VERSION,
+        "trained_at": trained_at or datetime.now().isoformat(),
+        "feature_names": list(FEATURE_NAMES),
+        "encoder_hash": encoder_config_hash(encoders),
+        "conversion_map": conversion,
+        "lightgbm_model": LIGHTGBM_FILE,
+        "trees": TREES_DIR,
+        "forest": forest.meta,
+        **(extra or {}),
+    }
+
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    booster.save_model(os.path.join(tmp_path, LIGHTGBM_FILE))
+    forest.save_arrays(os.path.join(tmp_path, TREES_DIR))
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    logger.info(f"Bundle del modelo guardado en: {path}")
+    return manifest
+
+def load_model_bundle(path: str, encoders: Optional[Dict[str, Any]] = None) -> ModelBundle:
+    """
+    Carga el manifiesto y los árboles con memoria mapeada.
+    Si se pasan los encoders en uso, falla si no son los mismos con los que se entrenó.
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Bundle de modelo no encontrado en {path}")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest: Dict[str, Any] = json.load(f)
+
+    version = manifest.get("format_version")
+    if version != BUNDLE_VERSION:
+        raise ValueError(f"Versión de bundle no soportada: {version} (se esperaba {BUNDLE_VERSION})")
+    if manifest.get("feature_names") != FEATURE_NAMES:
+        raise ValueError("Las features del bundle no coinciden con calculate_features")
+    if encoders is not None:
+        running_hash = encoder_config_hash(encoders)
+        if running_hash != manifest.get("encoder_hash"):
+            raise ValueError(
+                f"Los encoders de la config ({running_hash}) no coinciden con los del modelo ({manifest.get('encoder_hash')})"
+            )
+
+    forest = CompiledForest.load_arrays(os.path.join(path, manifest.get("trees", TREES_DIR)), manifest["forest"])
+    return ModelBundle(path, manifest, forest)
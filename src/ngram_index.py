@@ -0,0 +1,193 @@
+import logging
+import numpy as np
+from typing import Collection, Dict, List, Tuple
+from src.soft_cosine import encode_text
+
+logger = logging.getLogger(__name__)
+
+# Margen para el redondeo entre la cota y el score que calcula find_keywords
+_EPS = 1e-9
+
+def _previous_positions(grams: List[str]) -> np.ndarray:
+    """Para cada posición, la última posición anterior con el mismo n-grama (-1 si no hay)."""
+    last: Dict[str, int] = {}
+    prev = np.empty(len(grams), dtype=np.int64)
+    for p, g in enumerate(grams):
+        prev[p] = last.get(g, -1)
+        last[g] = p
+    return prev
+
+def _ranges(count: int, width: int) -> np.ndarray:
+    """Índices (count, width) de los rangos consecutivos j..j+width-1."""
+    return np.arange(count)[:, None] + np.arange(width)[None, :]
+
+class QueryGrams:
+    """
+    N-gramas de una consulta calculados una sola vez, con su posición. Los de la ventana q[j:j+w]
+    son las posiciones j..j+w-n, así que los code points y el número de n-gramas distintos de todas
+    las ventanas de un ancho salen por rangos de índices, sin volver a cortar la consulta.
+    """
+    def __init__(self, q: str, nrange: Tuple[int, int]):
+        self.q = q
+        self.nrange = nrange
+        self.codes = encode_text(q)
+        self.grams: Dict[int, List[str]] = {}
+        self.gram_codes: Dict[int, np.ndarray] = {}
+        self.prev: Dict[int, np.ndarray] = {}
+        for n in range(nrange[0], nrange[1] + 1):
+            grams = [q[j:j + n] for j in range(len(q) - n + 1)]
+            self.grams[n] = grams
+            self.gram_codes[n] = self.codes[_ranges(len(grams), n)]
+            self.prev[n] = _previous_positions(grams)
+        self._sizes: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.q)
+
+    def window_sizes(self, n: int, w: int) -> np.ndarray:
+        """N-gramas distintos de tamaño n de cada ventana de ancho w (una entrada por posición j)."""
+        key = (n, w)
+        sizes = self._sizes.get(key)
+        if sizes is None:
+            count = len(self.q) - w + 1
+            if w < n or count <= 0:
+                sizes = np.zeros(max(0, count), dtype=np.float64)
+            else:
+                # Un n-grama cuenta en la ventana j si su aparición anterior queda antes de j
+                windows = self.prev[n][_ranges(count, w - n + 1)]
+                sizes = (windows < np.arange(count)[:, None]).sum(axis=1).astype(np.float64)
+            self._sizes[key] = sizes
+        return sizes
+
+    def window_codes(self, n: int, w: int) -> np.ndarray:
+        """Code points de los n-gramas de cada ventana de ancho w: (ventanas, n-gramas, n)."""
+        return self.gram_codes[n][_ranges(len(self.q) - w + 1, w - n + 1)]
+
+def _as_postings(table: Dict[object, List[int]]) -> Dict[object, np.ndarray]:
+    return {key: np.asarray(ids, dtype=np.int64) for key, ids in table.items()}
+
+class NgramIndex:
+    """
+    Índice invertido n-grama -> candidatos de global_words para find_keywords.
+
+    Para cada n-grama de un candidato se busca en la consulta completa si aparece igual (aporta 1
+    a la intersección suave) o con un solo carácter distinto (como mucho (n-1)/n); si no, aporta
+    como mucho (n-2)/n. Con esos conteos y el mínimo de n-gramas distintos de las ventanas posibles
+    se obtiene una cota superior del score de cualquier ventana del candidato. Los candidatos cuya
+    cota no supera el umbral no comparten suficientes n-gramas con la consulta y no se evalúan:
+    ninguna de sus ventanas podría pasar. Los que aparecen literalmente en la consulta se evalúan siempre.
+    """
+    def __init__(self, words: List[str], grams: List[Dict[int, Collection[str]]], nrange: Tuple[int, int],
+                 weights: List[float], window_flex: int):
+        self.nrange = nrange
+        self.ns = list(range(nrange[0], nrange[1] + 1))
+        self.size = len(words)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.den = float(self.weights.sum())
+        # Con pesos negativos la cota deja de ser válida: se evalúan todos los candidatos
+        self.enabled = bool(self.size) and self.den > 0.0 and bool((self.weights >= 0.0).all())
+
+        lengths = np.array([len(w) for w in words], dtype=np.int64)
+        self.min_w = np.maximum(1, lengths - window_flex)
+        self.max_w = lengths + window_flex
+        # Ancho de ventana más corto con n-gramas de tamaño n (el que tiene menos n-gramas distintos)
+        self.wstar = np.maximum(self.min_w[None, :], np.array(self.ns, dtype=np.int64)[:, None])
+
+        # Por n: dueño de cada n-grama, su aporte máximo sin coincidencia exacta ni cercana y
+        # los índices exacto (n-grama) y cercano ((posición, n-grama sin esa posición))
+        self.sizes = np.zeros((len(self.ns), self.size), dtype=np.float64)
+        self.owners: List[np.ndarray] = []
+        self.far_caps: List[np.ndarray] = []
+        self.near_caps: List[np.ndarray] = []
+        self.exact: List[Dict[object, np.ndarray]] = []
+        self.near: List[Dict[object, np.ndarray]] = []
+        self.unbounded = np.zeros(self.size, dtype=bool)
+        for k, n in enumerate(self.ns):
+            owners: List[int] = []
+            far_caps: List[float] = []
+            near_caps: List[float] = []
+            exact: Dict[object, List[int]] = {}
+            near: Dict[object, List[int]] = {}
+            for i, cand_grams in enumerate(grams):
+                A = cand_grams.get(n, ())
+                self.sizes[k, i] = len(A)
+                for g in A:
+                    if not isinstance(g, str):
+                        self.unbounded[i] = True
+                        continue
+                    gid = len(owners)
+                    owners.append(i)
+                    exact.setdefault(g, []).append(gid)
+                    longest = max(len(g), n)
+                    near_caps.append((longest - 1) / longest)
+                    if len(g) == n:
+                        far_caps.append((n - 2) / n)
+                        for p in range(n):
+                            near.setdefault((p, g[:p] + g[p + 1:]), []).append(gid)
+                    else:
+                        far_caps.append((longest - 1) / longest)
+            self.owners.append(np.asarray(owners, dtype=np.int64))
+            self.far_caps.append(np.asarray(far_caps, dtype=np.float64))
+            self.near_caps.append(np.asarray(near_caps, dtype=np.float64))
+            self.exact.append(_as_postings(exact))
+            self.near.append(_as_postings(near))
+
+        self.by_word: Dict[str, List[int]] = {}
+        for i, w in enumerate(words):
+            self.by_word.setdefault(w, []).append(i)
+        self.lengths = sorted({len(w) for w in words if w})
+        logger.debug(f"Índice de n-gramas: {self.size} candidatos, {sum(len(o) for o in self.owners)} n-gramas")
+
+    def _soft_bound(self, k: int, n: int, grams: List[str]) -> np.ndarray:
+        """Cota de la intersección suave por candidato contra todos los n-gramas de la consulta."""
+        owners = self.owners[k]
+        if not len(owners):
+            return np.zeros(self.size, dtype=np.float64)
+        distinct = set(grams)
+        level = self.far_caps[k].copy()
+        near = self.near[k]
+        hits = [near[key] for b in distinct for key in ((p, b[:p] + b[p + 1:]) for p in range(n)) if key in near]
+        if hits:
+            ids = np.concatenate(hits)
+            level[ids] = self.near_caps[k][ids]
+        exact = self.exact[k]
+        hits = [exact[b] for b in distinct if b in exact]
+        if hits:
+            level[np.concatenate(hits)] = 1.0
+        return np.bincount(owners, weights=level, minlength=self.size)
+
+    def candidates(self, query: QueryGrams, threshold: float) -> List[int]:
+        """Índices (en orden) de los candidatos que podrían superar `threshold` en alguna ventana de la consulta."""
+        q = query.q
+        lq = len(q)
+        reachable = self.min_w <= lq
+        if not self.enabled:
+            return np.flatnonzero(reachable).tolist()
+
+        soft = np.zeros((len(self.ns), self.size), dtype=np.float64)
+        bmin = np.zeros((len(self.ns), self.size), dtype=np.float64)
+        for k, n in enumerate(self.ns):
+            if lq < n:
+                continue
+            soft[k] = self._soft_bound(k, n, query.grams[n])
+
+            wstar = self.wstar[k]
+            valid = wstar <= np.minimum(lq, self.max_w)
+            table = np.zeros(lq + 1, dtype=np.float64)
+            for w in np.unique(wstar[valid]):
+                table[w] = query.window_sizes(n, int(w)).min()
+            bmin[k] = np.where(valid, table[np.minimum(wstar, lq)], 0.0)
+
+        usable = (bmin > 0.0) & (self.sizes > 0.0)
+        terms = np.zeros_like(soft)
+        terms[usable] = soft[usable] / np.sqrt(self.sizes[usable] * bmin[usable])
+        bound = (self.weights[:, None] * terms).sum(axis=0) / self.den
+
+        keep = reachable & ((bound > threshold - _EPS) | self.unbounded)
+        for length in self.lengths:
+            if length > lq:
+                break
+            for j in range(lq - length + 1):
+                for i in self.by_word.get(q[j:j + length], ()):
+                    keep[i] = True
+        return np.flatnonzero(keep).tolist()
@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource  # No existe en Windows: ahí el pico de RSS queda en null
+except ImportError:
+    resource = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+def _cpu_seconds() -> float:
+    """CPU de usuario + sistema del proceso y de sus hijos ya terminados (workers de los pools)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reporta KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _git_commit(cwd: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() if out.returncode == 0 else None
+    except Exception:
+        return None
+
+class RunReport:
+    """
+    Tiempos por etapa de una corrida: pared, CPU, crecimiento del pico de RSS y filas/s.
+    Una etapa puede abrirse varias veces (p. ej. por archivo o por lote) y se acumula.
+    """
+    def __init__(self, name: str, project_root: str):
+        self.name = name
+        self.project_root = project_root
+        self.started = datetime.now().isoformat()
+        self._time0 = time.perf_counter()
+        self._cpu0 = _cpu_seconds()
+        self._rss0 = _peak_rss_mb()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[Dict[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        El dict que produce permite fijar 'rows' cuando sólo se conoce al terminar la etapa.
+        Las etapas anidadas se descuentan de la que las contiene: cada etapa reporta su tiempo propio.
+        """
+        info: Dict[str, Any] = {"rows": rows}
+        nested = {"wall_s": 0.0, "cpu_s": 0.0, "rss_mb": 0.0}
+        self._stack.append(nested)
+        wall0 = time.perf_counter()
+        cpu0 = _cpu_seconds()
+        rss0 = _peak_rss_mb()
+        try:
+            yield info
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = _cpu_seconds() - cpu0
+            rss1 = _peak_rss_mb()
+            rss = rss1 - rss0 if rss0 is not None and rss1 is not None else None
+            self._stack.pop()
+            if self._stack:
+                parent = self._stack[-1]
+                parent["wall_s"] += wall
+                parent["cpu_s"] += cpu
+                parent["rss_mb"] += rss or 0.0
+
+            entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "peak_rss_delta_mb": None, "rows": 0, "calls": 0})
+            entry["wall_s"] += wall - nested["wall_s"]
+            entry["cpu_s"] += cpu - nested["cpu_s"]
+            if rss is not None:
+                entry["peak_rss_delta_mb"] = (entry["peak_rss_delta_mb"] or 0.0) + rss - nested["rss_mb"]
+            entry["rows"] += int(info.get("rows", 0) or 0)
+            entry["calls"] += 1
+
+    def to_dict(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        wall = time.perf_counter() - self._time0
+        rss = _peak_rss_mb()
+        stages: List[Dict[str, Any]] = []
+        for name, entry in self.stages.items():
+            rows = entry["rows"]
+            stages.append({
+                "stage": name,
+                **entry,
+                "rows_per_s": rows / entry["wall_s"] if rows and entry["wall_s"] else None,
+            })
+        return {
+            "run": self.name,
+            "started": self.started,
+            "git_commit": _git_commit(self.project_root),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "wall_s": wall,
+            "cpu_s": _cpu_seconds() - self._cpu0,
+            "peak_rss_mb": rss,
+            "peak_rss_delta_mb": rss - self._rss0 if rss is not None and self._rss0 is not None else None,
+            "stages": stages,
+            **(extra or {}),
+        }
+
+    def save(self, report_path: str, history_path: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Escribe el reporte de la corrida y lo añade como una línea al historial (JSONL)."""
+        report = self.to_dict(extra)
+        try:
+            os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            with open(history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"No se pudo guardar el reporte de la corrida: {e}", exc_info=True)
+
+        for stage in report["stages"]:
+            rate = f", {stage['rows_per_s']:.0f} filas/s" if stage["rows_per_s"] else ""
+            logger.info(f"Etapa {stage['stage']}: {stage['wall_s']:.4f}s pared, {stage['cpu_s']:.4f}s CPU{rate}")
+        return report
@@ -0,0 +1,92 @@
+import numpy as np
+from typing import Iterable, List, Sequence, Tuple
+
+# Relleno distinto en cada lado: una posición rellenada nunca coincide
+PAD_A = -1
+PAD_B = -2
+# Celdas máximas de la matriz de coincidencias por bloque
+_MAX_CELLS = 4_000_000
+
+def encode_grams(grams: Iterable[str], pad: int = PAD_A) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    N-gramas como matriz de code points (una fila por n-grama, en el orden de iteración)
+    y sus longitudes. Las filas más cortas se rellenan con `pad`.
+    """
+    grams = list(grams)
+    lens = np.fromiter(map(len, grams), dtype=np.int64, count=len(grams))
+    width = int(lens.max()) if len(grams) else 0
+    if not len(grams) or not width:
+        return np.full((len(grams), width), pad, dtype=np.int64), lens
+    if (lens == width).all():
+        codes = np.frombuffer("".join(grams).encode("utf-32-le"), dtype=np.uint32).reshape(len(grams), width)
+        return codes.astype(np.int64), lens
+    codes = np.full((len(grams), width), pad, dtype=np.int64)
+    for row, g in enumerate(grams):
+        codes[row, :len(g)] = [ord(c) for c in g]
+    return codes, lens
+
+def encode_text(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+def _pad_to(codes: np.ndarray, width: int, pad: int) -> np.ndarray:
+    if codes.shape[1] >= width:
+        return codes
+    out = np.full((codes.shape[0], width), pad, dtype=np.int64)
+    out[:, :codes.shape[1]] = codes
+    return out
+
+def soft_intersections(a_codes: np.ndarray, a_lens: np.ndarray, owners: np.ndarray, count: int,
+                       b_codes: np.ndarray, b_lens: np.ndarray) -> np.ndarray:
+    """
+    Intersección suave de varios conjuntos A contra varios conjuntos B en una sola operación.
+    Las filas de a_codes son los n-gramas de los A (agrupados por `owners`, de 0 a count-1);
+    b_codes es (ventanas, n-gramas, ancho). Para cada n-grama de A y cada B se toma la mayor
+    proporción de posiciones iguales (normalizada por la longitud mayor) y se suma por dueño.
+    Devuelve una matriz (ventanas, count).
+    """
+    windows = b_codes.shape[0]
+    if not len(a_codes) or not b_codes.shape[1]:
+        return np.zeros((windows, count), dtype=np.float64)
+    width = max(a_codes.shape[1], b_codes.shape[2])
+    a = _pad_to(a_codes, width, PAD_A)
+    if b_codes.shape[2] < width:
+        b = np.full(b_codes.shape[:2] + (width,), PAD_B, dtype=np.int64)
+        b[:, :, :b_codes.shape[2]] = b_codes
+    else:
+        b = b_codes
+    best = np.empty((len(a), windows), dtype=np.float64)
+    # Por bloques de ventanas para acotar la matriz de coincidencias
+    step = max(1, _MAX_CELLS // max(1, len(a) * b.shape[1] * width))
+    for j0 in range(0, windows, step):
+        chunk = b[j0:j0 + step]
+        matches = (a[:, None, None, :] == chunk[None, :, :, :]).sum(axis=3)
+        best[:, j0:j0 + step] = (matches / np.maximum(a_lens[:, None, None], b_lens[None, j0:j0 + step, :])).max(axis=2)
+    # bincount acumula en el orden de las filas de A: misma suma que el bucle sobre A
+    bins = owners[:, None] * windows + np.arange(windows)[None, :]
+    return np.bincount(bins.ravel(), weights=best.ravel(), minlength=count * windows).reshape(count, windows).T
+
+def binary_cosine_scores(soft: Sequence[np.ndarray], sizes_a: Sequence[np.ndarray], sizes_b: Sequence[np.ndarray],
+                         weights: Sequence[float]) -> np.ndarray:
+    """
+    Score ponderado multi-n de cada ventana (filas) contra cada candidato (columnas):
+    sum_n w_n * soft_n / sqrt(|A_n| * |B_n|) / sum_n w_n (un n sin n-gramas en A o B sólo suma al denominador).
+    """
+    if not len(soft):
+        return np.zeros((0, 0), dtype=np.float64)
+    num = np.zeros(soft[0].shape, dtype=np.float64)
+    den = 0.0
+    for soft_n, size_a, size_b, w in zip(soft, sizes_a, sizes_b, weights):
+        den += w
+        denom = np.sqrt(size_b[:, None] * size_a[None, :])
+        cos = np.divide(soft_n, denom, out=np.zeros_like(num), where=denom > 0.0)
+        num += w * cos
+    if den <= 0.0:
+        return np.zeros_like(num)
+    return num / den
+
+def gather_rows(starts: np.ndarray, ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Filas de los candidatos `ids` en una matriz apilada por candidato, y el dueño local de cada fila."""
+    counts = starts[1:][ids] - starts[:-1][ids]
+    rows = np.concatenate([np.arange(starts[i], starts[i + 1]) for i in ids]) if ids else np.zeros(0, dtype=np.int64)
+    owners = np.repeat(np.arange(len(ids)), counts)
+    return rows.astype(np.int64), owners
@@ -1,13 +1,46 @@
 import logging
-import glob
-import json
 import os
-from src.calculate_features import calculate_features
-from typing import List, Dict, Any
+import time
+import numpy as np
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from src.calculate_features import FEATURE_NAMES, calculate_features_batch
+from src.feature_cache import FeatureCache
+from src.corpus_io import iter_records, list_corpus_files
+from src.run_report import RunReport
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Tuple
 from fuzzywuzzy import utils #type: ignore
 
 logger = logging.getLogger(__name__)
 
+# Polígonos por llamada a calculate_features_batch al leer un archivo en streaming
+_STREAM_BATCH_SIZE = 8192
+
+class FeatureSet(NamedTuple):
+    """Datos de entrenamiento en columnas: fila i de X corresponde a texts[i]."""
+    texts: List[str]
+    X: np.ndarray            # (N, len(FEATURE_NAMES)) float32
+    y_original: np.ndarray   # (N,) int32, etiquetas del semantic_map
+    y_mapped: np.ndarray     # (N,) int32, clases del modelo (conversion_map)
+
+# Un TrainModel por proceso worker, creado en el initializer del pool
+_worker_train: Optional["TrainModel"] = None
+
+def _init_features_worker(config: Dict[str, Dict[str, Any]], project_root: str, label_path: str) -> None:
+    global _worker_train
+    _worker_train = TrainModel(config, project_root, label_path)
+
+def _features_worker(file_path: str) -> Tuple[List[str], Any, np.ndarray, Tuple[int, bool, float]]:
+    """Features de un archivo dentro de un worker; añade (pid, vino de caché, segundos) para las métricas."""
+    if _worker_train is None:
+        raise RuntimeError("Worker sin TrainModel inicializado")
+    time0 = time.perf_counter()
+    cache = _worker_train.feature_cache
+    hits = cache.hits if cache is not None else 0
+    texts, labels, feats = _worker_train._file_features(file_path)
+    cached = cache is not None and cache.hits > hits
+    return texts, labels, feats, (os.getpid(), cached, time.perf_counter() - time0)
+
 class TrainModel:
     def __init__(self, config: Dict[str, Dict[str, Any]], project_root: str, label_path: str):
         self.project_root = project_root
@@ -17,35 +50,165 @@ class TrainModel:
         self.encoders = self.params.get("encoders", {})
         self.char_num: List[str] = self.encoders["char_num"]
         self._conversion_map: Dict[int, int] = self._build_conversion_map()
+        self.training = self.params.get("training", {}) or {}
+        self.feature_cache: Optional[FeatureCache] = self._build_feature_cache()
+        # Si ModelGenerator asigna un RunReport, se registran las etapas de lectura y features
+        self.report: Optional[RunReport] = None
+
+    def _stage(self, name: str, rows: int = 0) -> Any:
+        return self.report.stage(name, rows) if self.report is not None else nullcontext({"rows": rows})
+
+    def corpus_files(self) -> List[str]:
+        return list_corpus_files(self.label_path)
+
+    def file_hashes(self, corpus_files: Optional[List[str]] = None) -> Dict[str, str]:
+        """Hash de contenido de cada archivo de entrenamiento, por nombre de archivo."""
+        if corpus_files is None:
+            corpus_files = self.corpus_files()
+        return {os.path.basename(path): FeatureCache.file_hash(path) for path in corpus_files}
+
+    def generate_features(self, corpus_files: Optional[List[str]] = None) -> FeatureSet:
+        """Features de los archivos indicados (por defecto todos los de label_path) en columnas numpy, en el orden de glob."""
+        if corpus_files is None:
+            corpus_files = self.corpus_files()
+        workers = self._feature_workers(len(corpus_files))
+        logger.info(f"'{len(corpus_files)}' archivos para entrenamiento con {workers} workers")
+
+        if workers > 1:
+            with self._stage("features_parallel") as stage:
+                per_file = self._parallel_file_features(corpus_files, workers)
+                stage["rows"] = sum(len(texts) for texts, _, _ in per_file)
+        else:
+            per_file = [self._file_features(file_path) for file_path in corpus_files]
+
+        with self._stage("array_build") as stage:
+            feature_set = self._build_columns(per_file)
+            stage["rows"] = len(feature_set.texts)
+
+        if self.feature_cache is not None and workers == 1:
+            logger.info(f"Caché de features: {self.feature_cache.hits} archivos reutilizados, {self.feature_cache.misses} recalculados")
+        return feature_set
+
+    def _build_columns(self, per_file: List[Tuple[List[str], Any, np.ndarray]]) -> FeatureSet:
+        # Mismo orden de filas que el recorrido serial: el split con random_state=42 es reproducible
+        # Las columnas se reservan con el total de filas. per_file se vacía al copiar cada archivo,
+        # así su memoria se libera mientras se llenan las columnas en vez de convivir con ellas
+        n = sum(len(file_texts) for file_texts, _, _ in per_file)
+        X = np.empty((n, len(FEATURE_NAMES)), dtype=np.float32)
+        y_original = np.empty(n, dtype=np.int32)
+        texts: List[str] = []
+        start = 0
+        per_file.reverse()
+        while per_file:
+            file_texts, labels, feats = per_file.pop()
+            end = start + len(file_texts)
+            X[start:end] = feats
+            y_original[start:end] = labels
+            texts.extend(file_texts)
+            start = end
+
+        y_mapped = np.fromiter((self._convert_label(int(y)) for y in y_original), dtype=np.int32, count=n)
+        return FeatureSet(texts, X, y_original, y_mapped)
+
+    def _feature_workers(self, n_files: int) -> int:
+        workers = self.training.get("workers", 1)
+        workers = int(workers) if workers else (os.cpu_count() or 1)
+        return max(1, min(workers, n_files))
+
+    def _parallel_file_features(self, corpus_files: List[str], workers: int) -> List[Tuple[List[str], Any, np.ndarray]]:
+        """Reparte los archivos en un ProcessPoolExecutor; pool.map conserva el orden de corpus_files."""
+        chunksize = max(1, int(self.training.get("chunksize", 1) or 1))
+        time0 = time.perf_counter()
+        per_file: List[Tuple[List[str], Any, np.ndarray]] = []
+        per_worker: Dict[int, List[float]] = {}
+        hits = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_features_worker,
+                                 initargs=(self.config, self.project_root, self.label_path)) as pool:
+            for texts, labels, feats, (pid, cached, secs) in pool.map(_features_worker, corpus_files, chunksize=chunksize):
+                per_file.append((texts, labels, feats))
+                stats = per_worker.setdefault(pid, [0, 0, 0.0])
+                stats[0] += 1
+                stats[1] += len(texts)
+                stats[2] += secs
+                hits += int(cached)
+
+        for pid, (n_files, n_polygons, secs) in sorted(per_worker.items()):
+            logger.info(
+                f"Worker {pid}: {n_files} archivos, {n_polygons} polígonos en {secs:.4f}s "
+                f"({n_polygons / secs if secs else 0.0:.2f} polígonos/s)"
+            )
+        if self.feature_cache is not None:
+            logger.info(f"Caché de features: {hits} archivos reutilizados, {len(corpus_files) - hits} recalculados")
+        logger.info(f"Features en paralelo generadas en: {time.perf_counter()-time0:.4f}s")
+        return per_file
+
+    def _file_features(self, file_path: str) -> Tuple[List[str], Any, np.ndarray]:
+        """Textos, etiquetas originales y features de un archivo; usa la caché si el contenido no cambió."""
+        # file_read cubre hash, caché y parseo; el cálculo de features se mide aparte
+        with self._stage("file_read") as stage:
+            texts, labels, feats = self._read_file_features(file_path)
+            stage["rows"] = len(texts)
+        return texts, labels, feats
+
+    def _read_file_features(self, file_path: str) -> Tuple[List[str], Any, np.ndarray]:
+        """
+        El parseo va en streaming (sólo un lote de stream_batch_size polígonos sin procesar a la vez), pero
+        textos, etiquetas y features del archivo se guardan completos: la memoria está acotada por archivo.
+        """
+        file_hash = ""
+        if self.feature_cache is not None:
+            file_hash = self.feature_cache.file_hash(file_path)
+            cached = self.feature_cache.load(file_hash)
+            if cached is not None:
+                return cached
+
+        texts: List[str] = []
+        labels: List[int] = []
+        blocks: List[np.ndarray] = []
+        for batch_texts, batch_labels, batch_feats in self._feature_batches(self._labelled_texts(file_path)):
+            texts.extend(batch_texts)
+            labels.extend(batch_labels)
+            blocks.append(batch_feats)
+        if len(blocks) == 1:
+            feats = blocks[0]
+        else:
+            feats = np.concatenate(blocks) if blocks else np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)
+        if self.feature_cache is not None:
+            self.feature_cache.save(file_hash, texts, labels, feats)
+        return texts, labels, feats
+
+    def _labelled_texts(self, file_path: str) -> Iterator[Tuple[str, int]]:
+        """(texto, etiqueta original) de los polígonos válidos, leídos de forma incremental (JSON, NDJSON, Parquet o Arrow)."""
+        for _, text, label in iter_records(file_path):
+            if not utils.validate_string(text):  # type: ignore
+                continue
+            yield text, int(label)
+
+    def _feature_batches(self, labelled: Iterator[Tuple[str, int]]) -> Iterator[Tuple[List[str], List[int], np.ndarray]]:
+        """Agrupa los polígonos en lotes de stream_batch_size y calcula sus features lote a lote."""
+        batch_size = max(1, int(self.training.get("stream_batch_size", _STREAM_BATCH_SIZE) or _STREAM_BATCH_SIZE))
+        texts: List[str] = []
+        labels: List[int] = []
+        for text, label in labelled:
+            texts.append(text)
+            labels.append(label)
+            if len(texts) == batch_size:
+                yield texts, labels, self._batch_features(texts)
+                texts, labels = [], []
+        if texts:
+            yield texts, labels, self._batch_features(texts)
+
+    def _batch_features(self, texts: List[str]) -> np.ndarray:
+        with self._stage("feature_extraction", rows=len(texts)):
+            return calculate_features_batch(texts, self.encoders)
 
-    def generate_features(self) -> List[Dict[str, Any]]:
-        
-        rows: List[Dict[str, Any]] = []
-        json_files = glob.glob(os.path.join(self.label_path, '*.json'))
-        logger.info(f"'{len(json_files)}' archivos para entrenamiento")
-
-        for file_path in json_files:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                classified: Dict[str, Dict[str, Any]] = json.load(f)
-
-            for _, poly_data in classified.items():
-                if not poly_data:
-                    continue
-
-                text = poly_data.get("text", "")
-                if not utils.validate_string(text):  # type: ignore
-                    continue
-
-                y_orig = int(poly_data.get("semantic_clasification", 0))
-                feats = calculate_features(text, self.encoders)
-                y_map = self._convert_label(y_orig)
-                rows.append({
-                    "text": text,
-                    "label_original": y_orig,
-                    "label_mapped": y_map,
-                    **{f"f{i}": float(feats[i]) for i in range(len(feats))}
-                })
-        return rows
+    def _build_feature_cache(self) -> Optional[FeatureCache]:
+        cache_dir = self.training.get("feature_cache", os.path.join("data", "feature_cache"))
+        if not cache_dir:
+            return None
+        if not os.path.isabs(cache_dir):
+            cache_dir = os.path.join(self.project_root, cache_dir)
+        return FeatureCache(cache_dir, self.encoders)
 
     def _build_conversion_map(self) -> Dict[int, int]:
         """Build the label conversion map once during initialization."""
@@ -0,0 +1,196 @@
+import os
+import json
+import logging
+import numpy as np
+from typing import List, Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Mismos valores que LightGBM (MissingType y kZeroThreshold)
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_TYPES: Dict[str, int] = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+_ZERO_THRESHOLD = 1e-35
+# Hasta este número de filas compensa evaluar todos los nodos de una vez
+_ALL_NODES_MAX_ROWS = 4
+
+class CompiledForest:
+    """
+    Árboles de un Booster de LightGBM compilados en arreglos planos de numpy.
+    Los dos hijos de cada nodo son contiguos (hijo = child[nodo] + va_a_la_derecha) y las hojas
+    apuntan a sí mismas con umbral infinito, así la evaluación avanza max_depth pasos sin máscaras.
+    Predice sin importar lightgbm.
+    """
+    ARRAYS: Tuple[str, ...] = ("feature", "threshold", "child", "value", "missing_type", "default_left", "roots")
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        self.feature: np.ndarray = arrays["feature"]
+        self.threshold: np.ndarray = arrays["threshold"]
+        self.child: np.ndarray = arrays["child"]
+        self.value: np.ndarray = arrays["value"]
+        self.missing_type: np.ndarray = arrays["missing_type"]
+        self.default_left: np.ndarray = arrays["default_left"]
+        self.roots: np.ndarray = arrays["roots"]
+        self.meta = meta
+        self.num_class: int = int(meta["num_class"])
+        self.objective: str = str(meta["objective"])
+        self.max_depth: int = int(meta["max_depth"])
+        self.feature_names: List[str] = list(meta.get("feature_names", []))
+        self._missing_rules = bool(np.any(self.missing_type != MISSING_NONE))
+        # Índices en intp para que take no convierta en cada paso. from_dump y save_arrays ya los dejan
+        # en intp, así no hay copia y siguen en memoria mapeada; sólo los bundles antiguos (int32) se copian
+        self._feature = self.feature.astype(np.intp, copy=False)
+        self._child = self.child.astype(np.intp, copy=False)
+        self._roots = self.roots.astype(np.intp, copy=False)
+
+    @classmethod
+    def from_booster(cls, booster: Any, num_iteration: Optional[int] = None) -> "CompiledForest":
+        """Compila el volcado JSON del Booster (usa best_iteration igual que Booster.predict)."""
+        dump = booster.dump_model(num_iteration=num_iteration)
+        return cls.from_dump(dump)
+
+    @classmethod
+    def from_dump(cls, dump: Dict[str, Any]) -> "CompiledForest":
+        feature: List[int] = []
+        threshold: List[float] = []
+        child: List[int] = []
+        value: List[float] = []
+        missing_type: List[int] = []
+        default_left: List[bool] = []
+        roots: List[int] = []
+        max_depth = 0
+
+        def new_node() -> int:
+            feature.append(0)
+            threshold.append(np.inf)
+            child.append(len(child))
+            value.append(0.0)
+            missing_type.append(MISSING_NONE)
+            default_left.append(False)
+            return len(feature) - 1
+
+        for tree in dump["tree_info"]:
+            root = new_node()
+            roots.append(root)
+            stack: List[Tuple[Dict[str, Any], int, int]] = [(tree["tree_structure"], root, 0)]
+            while stack:
+                node, idx, depth = stack.pop()
+                if "split_index" not in node:
+                    value[idx] = float(node["leaf_value"])
+                    max_depth = max(max_depth, depth)
+                    continue
+
+                if node.get("decision_type", "<=") != "<=":
+                    raise ValueError(f"Split no soportado: {node.get('decision_type')}")
+                feature[idx] = int(node["split_feature"])
+                threshold[idx] = float(node["threshold"])
+                missing_type[idx] = _MISSING_TYPES.get(str(node.get("missing_type", "None")), MISSING_NONE)
+                default_left[idx] = bool(node.get("default_left", False))
+                left = new_node()
+                right = new_node()
+                child[idx] = left
+                stack.append((node["left_child"], left, depth + 1))
+                stack.append((node["right_child"], right, depth + 1))
+
+        arrays = {
+            "feature": np.array(feature, dtype=np.intp),
+            "threshold": np.array(threshold, dtype=np.float64),
+            "child": np.array(child, dtype=np.intp),
+            "value": np.array(value, dtype=np.float64),
+            "missing_type": np.array(missing_type, dtype=np.int8),
+            "default_left": np.array(default_left, dtype=bool),
+            "roots": np.array(roots, dtype=np.intp),
+        }
+        meta = {
+            "num_class": int(dump.get("num_tree_per_iteration", dump.get("num_class", 1))),
+            "objective": str(dump.get("objective", "")),
+            "max_depth": max_depth,
+            "feature_names": dump.get("feature_names", []),
+        }
+        logger.debug(f"Bosque compilado: {len(roots)} árboles, {len(feature)} nodos, profundidad {max_depth}")
+        return cls(arrays, meta)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        np.savez(path, meta=np.array(json.dumps(self.meta)), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            meta = json.loads(str(data["meta"]))
+        return cls(arrays, meta)
+
+    def save_arrays(self, directory: str) -> None:
+        """Guarda cada arreglo como .npy para poder abrirlos con memoria mapeada (los índices en intp)."""
+        os.makedirs(directory, exist_ok=True)
+        indices = {"feature": self._feature, "child": self._child, "roots": self._roots}
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), indices.get(name, getattr(self, name)))
+
+    @classmethod
+    def load_arrays(cls, directory: str, meta: Dict[str, Any], mmap_mode: Optional[str] = "r") -> "CompiledForest":
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False) for name in cls.ARRAYS}
+        return cls(arrays, meta)
+
+    def predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """Score bruto (N, num_class), sumando los árboles de cada clase en el orden de LightGBM."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        n_trees = self._roots.shape[0]
+        check_missing = self._missing_rules or bool(np.isnan(X).any())
+
+        if n_rows <= _ALL_NODES_MAX_ROWS:
+            # Pocas filas: todas las decisiones de todos los nodos de una vez, luego un take por nivel
+            n_nodes = self._feature.shape[0]
+            x = X[:, self._feature]
+            go_right = self._go_right(x, slice(None)) if check_missing else x > self.threshold
+            next_node = (self._child + go_right).ravel()
+            offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_nodes, n_trees)
+            node = np.tile(self._roots, n_rows)
+            for _ in range(self.max_depth):
+                node = next_node.take(node + offsets)
+        else:
+            # Lotes: sólo se evalúan los nodos visitados en cada nivel
+            flat = X.ravel()
+            offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+            node = np.tile(self._roots, n_rows)
+            for _ in range(self.max_depth):
+                x = flat.take(offsets + self._feature.take(node))
+                go_right = self._go_right(x, node) if check_missing else x > self.threshold.take(node)
+                node = self._child.take(node) + go_right
+
+        leaf_values = self.value.take(node).reshape(n_rows, n_trees // self.num_class, self.num_class)
+        # cumsum acumula secuencialmente, igual que el bucle de árboles de LightGBM
+        return np.cumsum(leaf_values, axis=1)[:, -1, :]
+
+    def _go_right(self, x: np.ndarray, nodes: Any) -> np.ndarray:
+        """Decisión con las reglas de valores faltantes de LightGBM (NaN -> 0 salvo missing_type NaN)."""
+        threshold = self.threshold[nodes]
+        missing_type = self.missing_type[nodes]
+        nan = np.isnan(x)
+        x = np.where(nan & (missing_type != MISSING_NAN), 0.0, x)
+        is_missing = ((missing_type == MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD)) | ((missing_type == MISSING_NAN) & nan)
+        return np.where(is_missing, ~self.default_left[nodes], ~(x <= threshold))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidades como Booster.predict: softmax para multiclass, sigmoide para binary."""
+        raw = self.predict_raw(X)
+        if self.objective.startswith("multiclass"):
+            shifted = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return shifted / shifted.sum(axis=1, keepdims=True)
+        if self.objective.startswith("binary"):
+            sigmoid = _objective_param(self.objective, "sigmoid", 1.0)
+            return 1.0 / (1.0 + np.exp(-sigmoid * raw[:, 0]))
+        return raw[:, 0] if self.num_class == 1 else raw
+
+def _objective_param(objective: str, name: str, default: float) -> float:
+    for token in objective.split():
+        key, _, raw = token.partition(":")
+        if key == name and raw:
+            return float(raw)
+    return default
@@ -0,0 +1,196 @@
+import os
+import sys
+import gc
+import glob
+import json
+import time
+import logging
+import argparse
+import platform
+import numpy as np
+from typing import List, Any, Callable, Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(filename)s:%(lineno)d %(message)s")
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from queries import base_queries, base_queries2, noisy_queries
+from src.calculate_features import calculate_features_fused, calculate_features_batch
+from src.encoder_tables import get_encoder_tables
+from src.semantic_classifier import SemanticClassifier
+
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "data", "config.yaml")
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "input")
+CLASSIFIER_MODEL = os.path.join(PROJECT_ROOT, "models", "sc_model")
+WF_MODEL = os.path.join(PROJECT_ROOT, "models", "wf_model.pkl")
+BASELINE_FILE = os.path.join(PROJECT_ROOT, "test", "benchmark_baseline.json")
+OUTPUT_FILE = os.path.join(PROJECT_ROOT, "data", "logs", "benchmark.json")
+BATCH_SIZES = (32, 256)
+
+def load_texts(data_folder: str) -> List[str]:
+    texts: List[str] = []
+    for file_path in sorted(glob.glob(os.path.join(data_folder, "*.json"))):
+        with open(file_path, "r", encoding="utf-8") as f:
+            polygons: Dict[str, Dict[str, Any]] = json.load(f)
+        for poly_data in polygons.values():
+            text = poly_data.get("text", "") if poly_data else ""
+            if isinstance(text, str) and text.strip():
+                texts.append(text)
+    return texts
+
+def batches(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def measure(name: str, fn: Callable[[Any], Any], calls: List[Any], items_per_call: List[int], rounds: int, warmup: int = 1) -> Dict[str, Any]:
+    """Latencia de cada llamada (ms) sobre `rounds` pasadas; throughput en elementos/s."""
+    for _ in range(warmup):
+        for arg in calls[:max(1, len(calls) // 10)]:
+            fn(arg)
+    latencies: List[float] = []
+    elapsed = 0.0
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for arg in calls:
+                t0 = time.perf_counter()
+                fn(arg)
+                dt = time.perf_counter() - t0
+                latencies.append(dt * 1000.0)
+                elapsed += dt
+    finally:
+        gc.enable()
+    lat = np.asarray(latencies)
+    items = sum(items_per_call) * rounds
+    result = {
+        "name": name,
+        "calls": len(latencies),
+        "items": items,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "items_per_s": items / elapsed if elapsed else 0.0,
+    }
+    logger.info(
+        f"{name}: p50 {result['p50_ms']:.4f}ms, p95 {result['p95_ms']:.4f}ms, p99 {result['p99_ms']:.4f}ms, "
+        f"{result['items_per_s']:.0f} elementos/s ({result['calls']} llamadas)"
+    )
+    return result
+
+def run_benchmarks(texts: List[str], queries: List[str], rounds: int) -> List[Dict[str, Any]]:
+    import yaml
+    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+        encoders = yaml.safe_load(f)["params"]["encoders"]
+    tables = get_encoder_tables(encoders)
+    results: List[Dict[str, Any]] = []
+
+    # Features: kernel fusionado por texto y el camino por lotes
+    results.append(measure("features/single", lambda t: calculate_features_fused(t, tables), texts, [1] * len(texts), rounds))
+    for size in BATCH_SIZES:
+        chunks = batches(texts, size)
+        results.append(measure(f"features/batch{size}", lambda b: calculate_features_batch(b, tables), chunks, [len(b) for b in chunks], rounds))
+
+    # Clasificador (bundle por defecto; features + predicción)
+    model_path = CLASSIFIER_MODEL if os.path.exists(CLASSIFIER_MODEL) else os.path.join(PROJECT_ROOT, "models", "sc_model.pkl")
+    classifier = SemanticClassifier(model_path, CONFIG_FILE, num_threads=1)
+    results.append(measure("classifier/single", lambda t: classifier.classify([t]), texts, [1] * len(texts), rounds))
+    for size in BATCH_SIZES:
+        chunks = batches(texts, size)
+        results.append(measure(f"classifier/batch{size}", classifier.classify, chunks, [len(b) for b in chunks], rounds))
+
+    # WordFinder: consultas con ruido de test_model.py y textos reales de input/
+    # Sin caché de resultados para medir la búsqueda en sí; las rondas repetidas sí lo usan en "cached"
+    wf = _load_word_finder(result_cache_size=0)
+    if wf is not None:
+        results.append(measure("find_keywords/queries", wf.find_keywords, queries, [1] * len(queries), rounds))
+        results.append(measure("find_keywords/single", wf.find_keywords, texts, [1] * len(texts), rounds))
+        for size in BATCH_SIZES:
+            chunks = batches(texts, size)
+            results.append(measure(f"find_keywords/batch{size}", wf.find_keywords, chunks, [len(b) for b in chunks], rounds))
+        cached = _load_word_finder()
+        if cached is not None:
+            results.append(measure("find_keywords/cached", cached.find_keywords, texts, [1] * len(texts), rounds))
+            logger.info(f"Caché de find_keywords: {cached.cache_stats()}")
+    return results
+
+def _load_word_finder(**kwargs: Any) -> Optional[Any]:
+    if not os.path.exists(WF_MODEL):
+        logger.warning(f"Sin modelo de WordFinder en {WF_MODEL}: se omite find_keywords")
+        return None
+    try:
+        from src.classification_model import WordFinder
+        return WordFinder(WF_MODEL, **kwargs)
+    except Exception as e:
+        logger.warning(f"No se pudo cargar WordFinder, se omite find_keywords: {e}")
+        return None
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> int:
+    """Cuenta regresiones: p50 por encima o throughput por debajo del baseline más la tolerancia (p95/p99 son muy ruidosos)."""
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = 0
+    for result in results:
+        base = previous.get(result["name"])
+        if base is None:
+            logger.info(f"{result['name']}: sin baseline")
+            continue
+        problems: List[str] = []
+        if result["p50_ms"] > base["p50_ms"] * (1.0 + tolerance):
+            problems.append(f"p50_ms {base['p50_ms']:.4f} -> {result['p50_ms']:.4f}")
+        if result["items_per_s"] < base["items_per_s"] * (1.0 - tolerance):
+            problems.append(f"items_per_s {base['items_per_s']:.0f} -> {result['items_per_s']:.0f}")
+        if problems:
+            regressions += 1
+            logger.error(f"REGRESIÓN {result['name']}: " + ", ".join(problems))
+        else:
+            ratio = base["items_per_s"] / result["items_per_s"] if result["items_per_s"] else float("inf")
+            logger.info(f"{result['name']}: OK (tiempo x{ratio:.2f} respecto al baseline)")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de features, clasificador y find_keywords sobre input/")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--data-dir", default=DATA_FOLDER)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Fracción de empeoramiento permitida")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda esta corrida como baseline")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    texts = load_texts(args.data_dir)
+    if not texts:
+        logger.error(f"No hay textos en {args.data_dir}")
+        return 1
+    queries = noisy_queries(base_queries + base_queries2)
+
+    results = run_benchmarks(texts, queries, args.rounds)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "texts": len(texts),
+        "queries": len(queries),
+        "rounds": args.rounds,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Baseline guardado en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.warning(f"Sin baseline en {args.baseline}; créalo con --save-baseline")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    return 1 if compare(results, baseline, args.tolerance) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.corpus_io import pa, iter_document_batches
+from scripts.convert_corpus import convert_folder
+
+# Dos documentos con los mismos poly_id, como los de input/
+DOCUMENTS = {
+    "doc_a": {"poly_0000": {"text": "TOTAL", "semantic_clasification": 1}, "poly_0001": {"text": "1,234.00", "semantic_clasification": 2}},
+    "doc_b": {"poly_0000": {"text": "SUBTOTAL", "semantic_clasification": 1}, "poly_0001": {"text": "99.90", "semantic_clasification": 2},
+              "poly_0002": {"text": "IVA", "semantic_clasification": 1}},
+}
+
+def check_merge(input_dir, output, fmt):
+    total = convert_folder(input_dir, output, fmt, merge=True)
+    rows = [(doc, poly_id, text) for docs, ids, texts, _ in iter_document_batches(output) for doc, poly_id, text in zip(docs, ids, texts)]
+    expected = [(doc, poly_id, data["text"]) for doc, polygons in DOCUMENTS.items() for poly_id, data in polygons.items()]
+    if total != len(expected) or rows != expected:
+        print(f"merge {fmt}: {len(rows)} filas de {len(expected)} (convert_folder devolvió {total})")
+        for row in rows:
+            print(f"  - {row}")
+        return 1
+    print(f"merge {fmt}: OK ({len(rows)} filas, {len(set((d, p) for d, p, _ in rows))} (document, poly_id) distintos)")
+    return 0
+
+def main():
+    errors = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = os.path.join(tmp, "input")
+        os.makedirs(input_dir)
+        for name, polygons in DOCUMENTS.items():
+            with open(os.path.join(input_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(polygons, f)
+
+        formats = ["ndjson"] + (["parquet", "arrow"] if pa is not None else [])
+        for fmt in formats:
+            errors += check_merge(input_dir, os.path.join(tmp, f"merged.{fmt}"), fmt)
+
+        try:
+            convert_folder(input_dir, os.path.join(tmp, "merged.json"), "json", merge=True)
+            print("merge json: se esperaba ValueError")
+            errors += 1
+        except ValueError:
+            print("merge json: OK (rechazado)")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
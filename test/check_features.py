@@ -0,0 +1,57 @@
+import os
+import sys
+import glob
+import json
+import yaml
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.calculate_features import FEATURE_NAMES, calculate_features, calculate_features_fused, calculate_features_batch
+
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "data", "config.yaml")
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "input")
+
+def load_texts(data_folder):
+    texts = []
+    for file_path in sorted(glob.glob(os.path.join(data_folder, "*.json"))):
+        with open(file_path, "r", encoding="utf-8") as f:
+            polygons = json.load(f)
+        for poly_data in polygons.values():
+            if poly_data:
+                texts.append(poly_data.get("text", ""))
+    return texts
+
+def report_mismatches(name, texts, ref, other):
+    # Comparación bit a bit de los float32
+    bad = np.flatnonzero((ref.view(np.uint32) != other.view(np.uint32)).any(axis=1))
+    if not bad.size:
+        print(f"{name}: OK ({len(texts)} textos, bit a bit)")
+        return 0
+    print(f"{name}: {bad.size} textos distintos")
+    for i in bad[:10]:
+        cols = np.flatnonzero(ref[i] != other[i])
+        print(f"  - '{texts[i]}': " + ", ".join(f"{FEATURE_NAMES[c]} {ref[i, c]!r} != {other[i, c]!r}" for c in cols))
+    return 1
+
+def main():
+    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+        encoders = yaml.safe_load(f)["params"]["encoders"]
+
+    texts = load_texts(DATA_FOLDER)
+    if not texts:
+        print("No hay textos en", DATA_FOLDER)
+        return 1
+
+    ref = np.stack([calculate_features(t, encoders) for t in texts])
+    fused = np.stack([calculate_features_fused(t, encoders) for t in texts])
+    batch = calculate_features_batch(texts, encoders)
+
+    errors = report_mismatches("calculate_features_fused", texts, ref, fused)
+    errors += report_mismatches("calculate_features_batch", texts, ref, batch)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
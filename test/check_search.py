@@ -0,0 +1,60 @@
+import os
+import sys
+import copy
+import logging
+import tempfile
+import yaml
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.hyperparam_search import HyperparamSearch
+
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "data", "config.yaml")
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "input")
+
+def run_search(config, workers, output_dir):
+    config = copy.deepcopy(config)
+    config["params"]["search"]["workers"] = workers
+    return HyperparamSearch(config, PROJECT_ROOT, DATA_FOLDER, output_dir).run()["report"]
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    # Búsqueda corta: dos candidatos del grid de config.yaml, sin escribir en la caché de features
+    config["params"]["training"]["feature_cache"] = None
+    search = config["params"].setdefault("search", {}) or {}
+    config["params"]["search"] = search
+    search.update(random_samples=2, folds=3, num_boost_round=20, early_stopping_rounds=5)
+
+    errors = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        reports = {}
+        for workers in (1, 2):
+            try:
+                reports[workers] = run_search(config, workers, os.path.join(tmp, f"workers{workers}"))
+            except Exception as e:
+                print(f"HyperparamSearch.run con {workers} workers: error {type(e).__name__}: {e}")
+                errors += 1
+                continue
+            report = reports[workers]
+            ranks = [r["rank"] for r in report["results"]]
+            if len(report["results"]) != 2 or ranks != [1, 2] or not os.path.exists(os.path.join(tmp, f"workers{workers}", "best_model.pkl")):
+                print(f"HyperparamSearch.run con {workers} workers: reporte incompleto {report['results']}")
+                errors += 1
+            else:
+                print(f"HyperparamSearch.run con {workers} workers: OK (mejor {report['results'][0]['overrides']}, {report['best_rounds']} rondas)")
+
+        if len(reports) == 2:
+            scores = [{(str(r["overrides"]), r["score"], r["best_rounds"]) for r in reports[w]["results"]} for w in (1, 2)]
+            if scores[0] != scores[1]:
+                print(f"Scores distintos con 1 y 2 workers: {scores[0]} != {scores[1]}")
+                errors += 1
+            else:
+                print("Scores iguales con 1 y 2 workers")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,301 @@
+import os
+import sys
+import glob
+import json
+import math
+import pickle
+import random
+import tempfile
+from sklearn.feature_extraction.text import CountVectorizer
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.classification_model import WordFinder
+from queries import base_queries, base_queries2, noisy_queries
+
+DATA_FOLDER = os.path.join(PROJECT_ROOT, "input")
+# None es el threshold_similarity del modelo
+THRESHOLDS = [None, 0.3, 0.5, 0.62, 0.8]
+# Los scores pueden diferir en el último ulp según el orden de iteración de los sets (PYTHONHASHSEED)
+TOLERANCE = 1e-9
+# Fracción mínima de consultas con coincidencias en la referencia por umbral: si _clean_text devuelve None
+# (p. ej. con el paquete clean-text en lugar de cleantext, que no acepta clean_all/punct) ambos lados dan []
+# y la comparación pasaría sin probar nada
+MIN_MATCHED_FRACTION = 0.2
+
+# Modelo sintético: variantes por campo, palabras aleatorias para que el índice de n-gramas tenga que podar,
+# y n-gramas en todos los formatos que acepta WordFinder (dict, lista, tupla y formato desconocido)
+FIELDS = {
+    "total": ["total", "importe total", "total a pagar", "monto"],
+    "subtotal": ["subtotal", "sub total"],
+    "precio": ["precio", "precio unitario", "p unit", "pu"],
+    "cantidad": ["cantidad", "cant", "qty", "unidades"],
+    "fecha": ["fecha", "fecha de emision", "dia"],
+    "concepto": ["concepto", "descripcion", "detalle", "articulo", "producto"],
+    "iva": ["iva", "impuesto", "impuestos"],
+    "folio": ["folio", "ticket", "referencia", "no de ticket"],
+    "razon": ["razon social", "cliente", "rfc"],
+    "codigo": ["codigo", "sku", "clave", "modelo"],
+}
+NOISE = ["gracias", "vuelva pronto", "www", "telefono", "puntos"]
+EXTRA_WORDS = 40
+
+def char_grams(s, lo, hi):
+    return {n: {s[i:i + n] for i in range(len(s) - n + 1)} for n in range(lo, hi + 1)}
+
+def build_model(path, seed=0):
+    rng = random.Random(seed)
+    words, variant_to_field = [], {}
+    for field, variants in FIELDS.items():
+        for v in variants:
+            words.append(v)
+            variant_to_field[v] = field
+    for k in range(EXTRA_WORDS):
+        w = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 14)))
+        if w not in variant_to_field:
+            words.append(w)
+            variant_to_field[w] = f"extra{k % 10}"
+
+    global_ngrams = []
+    for i, w in enumerate(words):
+        grams = char_grams(w, 2, 5)
+        flat = [g for n in sorted(grams) for g in sorted(grams[n])]
+        global_ngrams.append([grams, flat, tuple(flat), [(w, 1.0)]][i % 4])
+    noise_grams = []
+    for i, w in enumerate(NOISE):
+        grams = char_grams(w, 2, 4)
+        noise_grams.append(grams if i % 2 else [g for n in sorted(grams) for g in sorted(grams[n])])
+    counter = CountVectorizer().fit([" ".join(g for w in words for grams in char_grams(w, 2, 5).values() for g in sorted(grams))])
+
+    model = {
+        "params": {
+            "global_filter_threshold": 0.3, "threshold_similarity": 0.72,
+            "char_ngram_global": [2, 5], "char_ngram_noise": [2, 4],
+            "thresholds_by_len": [[1, 4, 0.9], [5, 100, 0.8]],
+            "weights_by_n": [[2, 2, 0.5], [3, 3, 1.0], [4, 5, 1.5]],
+            "window_flexibility": 2, "forb_match": 0.85,
+        },
+        "global_words": words, "variant_to_field": variant_to_field, "noise_words": NOISE,
+        "noise_filter": {"noise_grams": noise_grams},
+        "global_filter": {"global_ngrams": global_ngrams, "global_counter": counter, "global_vocab": counter.vocabulary_},
+        "model_time": "check_word_finder",
+    }
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+def load_queries(limit_per_file=60):
+    queries = noisy_queries(base_queries + base_queries2, variants=1)
+    for file_path in sorted(glob.glob(os.path.join(DATA_FOLDER, "*.json")))[:2]:
+        with open(file_path, "r", encoding="utf-8") as f:
+            polygons = json.load(f)
+        texts = [p.get("text") for p in polygons.values() if p and isinstance(p.get("text"), str) and p["text"].strip()]
+        queries.extend(texts[:limit_per_file])
+    return queries
+
+class ReferenceFinder:
+    """
+    Búsqueda original de WordFinder.find_keywords, sin índice ni vectorización: recorre todas las
+    palabras del modelo y todas las ventanas de la consulta con el coseno binario suave en Python puro.
+    Los scores de una consulta no dependen del umbral, así que se calculan una vez y se filtran por umbral.
+    """
+    def __init__(self, wf):
+        self.wf = wf
+        self._similarity = {}
+        self._forbidden = {}
+        self._hits = {}
+
+    def grams(self, q, nrange):
+        return {n: set(q[i:i + n] for i in range(len(q) - n + 1)) if 0 < n <= len(q) else set()
+                for n in range(nrange[0], nrange[1] + 1)}
+
+    def normalize(self, grams, word, nrange):
+        if isinstance(grams, dict):
+            return grams
+        if isinstance(grams, (list, tuple, set)) and all(isinstance(x, str) for x in grams):
+            normalized = {}
+            for g in grams:
+                normalized.setdefault(len(g), set()).add(g)
+            return normalized
+        return self.grams(word, nrange)
+
+    def ngram_similarity(self, a, b):
+        key = (a, b)
+        sim = self._similarity.get(key)
+        if sim is None:
+            sim = float(sum(1 for x, y in zip(a, b) if x == y)) / float(max(len(a), len(b)))
+            self._similarity[key] = sim
+        return sim
+
+    def score(self, grams_a, grams_b, nrange):
+        num = 0.0
+        den = 0.0
+        for n in range(nrange[0], nrange[1] + 1):
+            A = grams_a.get(n, set())
+            B = grams_b.get(n, set())
+            w = self.wf._get_weight_by_n(n)
+            if not A or not B:
+                den += w
+                continue
+            soft = 0.0
+            for gram_a in A:
+                max_sim = 0.0
+                for gram_b in B:
+                    sim = self.ngram_similarity(gram_a, gram_b)
+                    if sim > max_sim:
+                        max_sim = sim
+                soft += max_sim
+            num += w * (soft / float((len(A) * len(B)) ** 0.5))
+            den += w
+        return num / den if den > 0.0 else 0.0
+
+    def window_scores(self, q, words, raw_grams, nrange, stop_above=None):
+        """(índice de palabra, score) de cada ventana en el orden palabra -> ancho -> posición."""
+        flex = self.wf.window_flex
+        for i, word in enumerate(words):
+            if not word:
+                continue
+            min_w = max(1, len(word) - flex)
+            if min_w > len(q):
+                continue
+            grams_word = self.normalize(raw_grams[i], word, nrange)
+            for w in range(min_w, min(len(q), len(word) + flex) + 1):
+                for j in range(len(q) - w + 1):
+                    sub = q[j:j + w]
+                    if sub == word:
+                        score = 1.0
+                    else:
+                        score = self.score(grams_word, self.grams(sub, nrange), nrange)
+                        if max(len(sub), len(word)) / max(1, min(len(sub), len(word))) >= 2.0:
+                            score *= min(len(sub), len(word)) / max(len(sub), len(word))
+                    yield i, score
+                    if stop_above is not None and score > stop_above:
+                        return
+
+    def is_forbidden(self, q):
+        flag = self._forbidden.get(q)
+        if flag is None:
+            wf = self.wf
+            flag = any(s > wf.forb_match for _, s in self.window_scores(q, wf.noise_words, wf.noise_grams, wf.ngr, wf.forb_match))
+            self._forbidden[q] = flag
+        return flag
+
+    def is_potential(self, q):
+        wf = self.wf
+        grams = [q[i:i + n] for n in range(wf.gngr[0], wf.gngr[1] + 1) for i in range(len(q) - n + 1)]
+        if not grams:
+            return False
+        score = wf.global_counter.transform([" ".join(grams)]).sum() / max(1, len(grams))
+        return score > wf.global_filter_threshold
+
+    def hits(self, q):
+        hits = self._hits.get(q)
+        if hits is None:
+            wf = self.wf
+            hits = []
+            if self.is_potential(q) and not self.is_forbidden(q):
+                hits = list(self.window_scores(q, wf.global_words, wf.global_ngrams, wf.gngr))
+            self._hits[q] = hits
+        return hits
+
+    def find(self, s, threshold):
+        wf = self.wf
+        threshold = wf.threshold if threshold is None else threshold
+        q = wf._clean_text(s)
+        if not q:
+            return []
+        best = {}
+        for i, score in self.hits(q):
+            word = wf.global_words[i]
+            if score <= threshold or self.is_forbidden(word):
+                continue
+            field = wf.variant_to_field.get(word)
+            if field not in best or score > best[field]["similarity"]:
+                best[field] = {"key_field": field, "word_found": word, "similarity": float(score), "text": q}
+        matches = list(best.values())
+        if len(matches) > 1:
+            for match in matches:
+                keyword = wf._clean_text(match["word_found"])
+                match["score_final"] = self.score(self.grams(keyword, wf.gngr), self.grams(q, wf.gngr), wf.gngr)
+            matches.sort(key=lambda m: m["score_final"], reverse=True)
+            matches = matches[:1]
+        return matches
+
+def same_matches(ref, other):
+    if ref is None or other is None:
+        return ref is other
+    if len(ref) != len(other):
+        return False
+    for a, b in zip(ref, other):
+        if set(a) != set(b):
+            return False
+        for k, v in a.items():
+            if isinstance(v, float):
+                if not math.isclose(v, b[k], rel_tol=0.0, abs_tol=TOLERANCE):
+                    return False
+            elif v != b[k]:
+                return False
+    return True
+
+def report(name, failures, total):
+    if not failures:
+        print(f"{name}: OK ({total} comparaciones)")
+        return 0
+    print(f"{name}: {len(failures)} de {total} distintos")
+    for label, ref, other in failures[:10]:
+        print(f"  - {label}\n      referencia: {ref}\n      WordFinder: {other}")
+    return 1
+
+def main():
+    queries = load_queries()
+    errors = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "wf_model.pkl")
+        build_model(model_path)
+        # Sin caché de resultados: cada llamada pasa por el índice y el scoring vectorizado
+        wf = WordFinder(model_path, result_cache_size=0)
+        reference = ReferenceFinder(wf)
+
+        cleaned = sum(1 for q in queries if wf._clean_text(q))
+        if not cleaned:
+            print(f"_clean_text devuelve None o vacío para las {len(queries)} consultas: revisa que el paquete instalado sea cleantext")
+            return 1
+
+        failures, total = [], 0
+        for threshold in THRESHOLDS:
+            matched = 0
+            for q in queries:
+                ref = reference.find(q, threshold)
+                got = wf.find_keywords(q, threshold)
+                total += 1
+                matched += bool(ref)
+                if not same_matches(ref, got):
+                    failures.append((f"find_keywords({q!r}, {threshold})", ref, got))
+            if matched < MIN_MATCHED_FRACTION * len(queries):
+                print(f"Umbral {threshold}: solo {matched} de {len(queries)} consultas con coincidencias en la referencia")
+                errors += 1
+        errors += report("find_keywords", failures, total)
+
+        failures = []
+        for threshold in THRESHOLDS:
+            ref = [m for q in queries for m in reference.find(q, threshold)]
+            got = wf.find_keywords(queries, threshold)
+            if not same_matches(ref, got):
+                failures.append((f"find_keywords(lista de {len(queries)}, {threshold})", len(ref), None if got is None else len(got)))
+        errors += report("find_keywords (lista)", failures, len(THRESHOLDS))
+
+        # Suficientes textos para que find_keywords_batch use el pool de procesos
+        documents = [queries[i:i + 50] for i in range(0, len(queries), 50)] * 2
+        failures = []
+        for threshold in (None, 0.5):
+            got = wf.find_keywords_batch(documents, threshold, workers=2)
+            for d, document in enumerate(documents):
+                ref = [m for q in document for m in reference.find(q, threshold)]
+                if not same_matches(ref, got[d]):
+                    failures.append((f"find_keywords_batch documento {d}, {threshold}", len(ref), None if got[d] is None else len(got[d])))
+        errors += report("find_keywords_batch", failures, 2 * len(documents))
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
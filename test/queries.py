@@ -0,0 +1,56 @@
+import random
+from typing import Any, List
+
+# Consultas de prueba compartidas por test_model.py y benchmark.py
+base_queries: List[str] = [
+    "ticketrazon", "preciocantidad", "detalleconcepto", "referenciaproducto",
+    "servicioprecio", "subtotalhora", "cantidadsku", "importemodelo",
+    "totalservicio", "fechadescripcion", "articulofolio", "marcaconcepto",
+    "ivaarticulo", "razonsocialticket", "preciounitariocodigo", "ticketxyz",
+    "totalxpto", "fechaclienteabc", "importetest", "sku", "modeloprueba",
+    "preciounitario", "cantidadbar", "serviciolorem", "detalletest",
+    "code"
+]
+base_queries2: List[str] = [
+    "ticket razon", "precio cantidad", "detalle concepto", "referencia producto",
+    "servicio precio", "subtotal hora", "cantidad sku", "importe modelo",
+    "total servicio", "fecha descripcion", "articulo folio", "marca concepto",
+    "iva articulo", "razon social ticket", "precio unitario codigo", "ticket xyz",
+    "total xpto", "fecha cliente abc", "importe test", "sku", "modelo prueba",
+    "precio unitario", "cantidad bar", "servicio lorem", "detalle test",
+    "code", "puntuación", "puntualidad", "estudiante", "italiano", "punt",
+    "puntillas", "pun", "puesto", "amarillo", "punct", "punto", "ano", "titulo"
+]
+
+# Perturbaciones (rng por defecto: el módulo random global)
+def delete_char(s: str, rng: Any = random) -> str:
+    if len(s) <= 2: return s
+    i = rng.randrange(len(s))
+    return s[:i] + s[i+1:]
+
+def swap_chars(s: str, rng: Any = random) -> str:
+    if len(s) <= 2: return s
+    i = rng.randrange(len(s)-1)
+    lst = list(s)
+    lst[i], lst[i+1] = lst[i+1], lst[i]
+    return "".join(lst)
+
+def replace_char(s: str, rng: Any = random) -> str:
+    if not s: return s
+    i = rng.randrange(len(s))
+    return s[:i] + rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890!@#$%^&*()_+-=[]{}|;':\",./<>?`~áéíóúàèìòùâêîôûäëïöüñçÁÉÍÓÚÀÈÌÒÙÂÊÎÔÛÄËÏÖÜÑÇ") + s[i+1:]
+
+def perturb(s: str, rng: Any = random) -> str:
+    ops = [delete_char, swap_chars, replace_char]
+    f = rng.choice(ops)
+    return f(s, rng)
+
+def noisy_queries(queries: List[str], variants: int = 3, seed: int = 42) -> List[str]:
+    """Cada consulta seguida de `variants` versiones con ruido; misma semilla, mismas consultas."""
+    rng = random.Random(seed)
+    text: List[str] = []
+    for q in queries:
+        text.append(q)
+        for _ in range(variants):
+            text.append(perturb(q, rng))
+    return text
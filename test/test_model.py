@@ -38,56 +38,10 @@ try:
         model = pickle.load(f)
 except Exception as e:
     logger.info(f"Error: {e}", exc_info=True)
-base_queries: List[str] = [
-    "ticketrazon", "preciocantidad", "detalleconcepto", "referenciaproducto",
-    "servicioprecio", "subtotalhora", "cantidadsku", "importemodelo",
-    "totalservicio", "fechadescripcion", "articulofolio", "marcaconcepto",
-    "ivaarticulo", "razonsocialticket", "preciounitariocodigo", "ticketxyz",
-    "totalxpto", "fechaclienteabc", "importetest", "sku", "modeloprueba",
-    "preciounitario", "cantidadbar", "serviciolorem", "detalletest",
-    "code"
-]
-base_queries2: List[str] = [
-    "ticket razon", "precio cantidad", "detalle concepto", "referencia producto",
-    "servicio precio", "subtotal hora", "cantidad sku", "importe modelo",
-    "total servicio", "fecha descripcion", "articulo folio", "marca concepto",
-    "iva articulo", "razon social ticket", "precio unitario codigo", "ticket xyz",
-    "total xpto", "fecha cliente abc", "importe test", "sku", "modelo prueba",
-    "precio unitario", "cantidad bar", "servicio lorem", "detalle test",
-    "code", "puntuación", "puntualidad", "estudiante", "italiano", "punt",
-    "puntillas", "pun", "puesto", "amarillo", "punct", "punto", "ano", "titulo"
-]
-
-# Perturbaciones
-def delete_char(s: str) -> str:
-    if len(s) <= 2: return s
-    i = random.randrange(len(s))
-    return s[:i] + s[i+1:]
-
-def swap_chars(s: str) -> str:
-    if len(s) <= 2: return s
-    i = random.randrange(len(s)-1)
-    lst = list(s)
-    lst[i], lst[i+1] = lst[i+1], lst[i]
-    return "".join(lst)
-
-def replace_char(s: str) -> str:
-    if not s: return s
-    i = random.randrange(len(s))
-    return s[:i] + random.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890!@#$%^&*()_+-=[]{}|;':\",./<>?`~áéíóúàèìòùâêîôûäëïöüñçÁÉÍÓÚÀÈÌÒÙÂÊÎÔÛÄËÏÖÜÑÇ") + s[i+1:]
-
-def perturb(s: str) -> str:
-    ops = [delete_char, swap_chars, replace_char]
-    f = random.choice(ops)
-    return f(s)
+from queries import base_queries, base_queries2, delete_char, swap_chars, replace_char, perturb, noisy_queries
 
 # Generar queries con ruido
-random.seed(42)
-text: List[str] = []
-for q in base_queries and base_queries2:
-    text.append(q)
-    for _ in range(3):
-        text.append(perturb(q))
+text: List[str] = noisy_queries(base_queries and base_queries2)
 
 def log_model_summary(wf: WordFinder):
     try: